@@ -73,9 +73,61 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT", default="5432"),
     }
 }
+if "test" in sys.argv and not os.getenv("TEST_USE_DB_ENGINE"):
+    # A file-backed database lets threaded tests use several connections.
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"NAME": os.path.join(BASE_DIR, "test_db.sqlite3")},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default="foodgram"),
+    }
+}
 if "test" in sys.argv:
-    DATABASES["default"]["ENGINE"] = "django.db.backends.sqlite3"
-    DATABASES["default"]["NAME"] = ":memory:"
+    CACHES["default"]["BACKEND"] = (
+        "django.core.cache.backends.locmem.LocMemCache"
+    )
+
+REFERENCE_DATA_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+INGREDIENT_SEARCH_ENGINE = os.getenv("INGREDIENT_SEARCH_ENGINE", "memory")
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    default="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 0 if "test" in sys.argv else 30)
+)
+
+IMAGE_RENDITIONS = {
+    "thumbnail": (320, 320),
+    "card": (800, 800),
+    "full": (1600, 1600),
+}
+
+IMAGE_RENDITION_FORMAT = os.getenv("IMAGE_RENDITION_FORMAT", "webp")
+
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", 2))
+
+RECIPE_TRENDING = {
+    "HALF_LIFE_HOURS": float(os.getenv("TRENDING_HALF_LIFE_HOURS", 72)),
+    "RECIPE_WEIGHT": 1.0,
+    "FAVORITE_WEIGHT": 1.0,
+    "SHOPPING_CART_WEIGHT": 0.5,
+}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -117,10 +169,17 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
 }
 
+TOKEN_AUTH_CACHE = {
+    "MAXSIZE": int(os.getenv("TOKEN_AUTH_CACHE_MAXSIZE", 10000)),
+    "TTL": int(os.getenv("TOKEN_AUTH_CACHE_TTL", 30)),
+    "SHARED_ALIAS": os.getenv("TOKEN_AUTH_CACHE_SHARED_ALIAS"),
+    "SHARED_TTL": int(os.getenv("TOKEN_AUTH_CACHE_SHARED_TTL", 300)),
+}
+
 DJOSER = {
     "SERIALIZERS": {
         "user": "users.serializers.CustomUserSerializer",
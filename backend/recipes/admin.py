@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
 
 
 @admin.register(Tag)
@@ -36,7 +36,7 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         "name",
         "author",
-        "count_favorites",
+        "favorites_count",
     )
     list_filter = (
         "author",
@@ -44,9 +44,6 @@ class RecipeAdmin(admin.ModelAdmin):
         "tags",
     )
 
-    def count_favorites(self, obj):
-        return obj.favorites.count()
-
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
@@ -64,3 +61,13 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         "user",
         "recipe",
     )
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "user",
+        "ingredient",
+        "amount",
+    )
@@ -0,0 +1,101 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+TAGS = "tags"
+INGREDIENTS = "ingredients"
+
+
+def get_cache():
+    return caches[settings.REFERENCE_DATA_CACHE["ALIAS"]]
+
+
+def _version_key(namespace):
+    return f"reference:{namespace}:version"
+
+
+def _new_version():
+    return uuid.uuid4().hex, int(time.time())
+
+
+def get_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    version = _new_version()
+    cache.add(key, version, None)
+    return cache.get(key) or version
+
+
+def get_or_set(namespace, name, default):
+    version, _ = get_version(namespace)
+    return get_cache().get_or_set(
+        f"reference:{namespace}:{version}:{name}",
+        default,
+        settings.REFERENCE_DATA_CACHE["TIMEOUT"],
+    )
+
+
+def _set_new_versions(namespaces):
+    get_cache().set_many(
+        {_version_key(namespace): _new_version() for namespace in namespaces},
+        None,
+    )
+
+
+def invalidate(*namespaces):
+    # The version is replaced again on commit, so a request that read
+    # the old rows before the commit cannot keep them under it.
+    _set_new_versions(namespaces)
+    transaction.on_commit(lambda: _set_new_versions(namespaces))
+
+
+class CachedReadOnlyMixin:
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self._get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _get_cached_response(self, handler, request, *args, **kwargs):
+        version, last_modified = get_version(self.cache_namespace)
+        digest = hashlib.md5(
+            f"{request.accepted_media_type}:{request.get_full_path()}".encode()
+        ).hexdigest()
+        etag = quote_etag(f"{version}-{digest}")
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(last_modified),
+        }
+        response = get_conditional_response(request, etag, last_modified)
+        if response is not None:
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        cache = get_cache()
+        key = f"reference:{self.cache_namespace}:{version}:{digest}"
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.REFERENCE_DATA_CACHE["TIMEOUT"])
+        return Response(data, headers=headers)
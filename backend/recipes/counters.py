@@ -0,0 +1,54 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def change_counters(queryset, **deltas):
+    return queryset.update(
+        **{
+            field: Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+    )
+
+
+def count_subquery(queryset, field, outer_field="pk"):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def reconcile_counters(queryset, counters, batch_size=1000, dry_run=False):
+    fields = list(counters)
+    actual = {f"actual_{field}": counters[field] for field in fields}
+    drift = Q()
+    for field in fields:
+        drift |= ~Q(**{field: F(f"actual_{field}")})
+    repaired = 0
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return repaired
+        last_pk = pks[-1]
+        rows = list(
+            queryset.filter(pk__in=pks)
+            .annotate(**actual)
+            .filter(drift)
+            .only("pk", *fields)
+        )
+        for row in rows:
+            for field in fields:
+                setattr(row, field, getattr(row, f"actual_{field}"))
+        if rows and not dry_run:
+            queryset.model.objects.bulk_update(rows, fields)
+        repaired += len(rows)
@@ -0,0 +1,180 @@
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.utils.mediatypes import _MediaType, media_type_matches
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+TITLE = "Список покупок"
+HEADERS = ("Ингредиент", "Количество", "Единица измерения")
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListExporter(ABC):
+    format = None
+    media_type = None
+
+    @property
+    def content_type(self):
+        return f"{self.media_type}; charset=utf-8"
+
+    @property
+    def filename(self):
+        return f"shopping_list.{self.format}"
+
+    @abstractmethod
+    def stream(self, rows):
+        pass
+
+
+class TextExporter(ShoppingListExporter):
+    format = "txt"
+    media_type = "text/plain"
+
+    def stream(self, rows):
+        yield f"{TITLE}:\n"
+        for number, (name, amount, measurement_unit) in enumerate(rows, 1):
+            yield f"{number}. {name} - {amount} {measurement_unit}\n"
+
+
+class CSVExporter(ShoppingListExporter):
+    format = "csv"
+    media_type = "text/csv"
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(HEADERS)
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class JSONExporter(ShoppingListExporter):
+    format = "json"
+    media_type = "application/json"
+
+    def stream(self, rows):
+        separator = "["
+        for name, amount, measurement_unit in rows:
+            item = {
+                "name": name,
+                "amount": amount,
+                "measurement_unit": measurement_unit,
+            }
+            yield separator + json.dumps(item, ensure_ascii=False)
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+
+class PDFExporter(ShoppingListExporter):
+    format = "pdf"
+    media_type = "application/pdf"
+    content_type = media_type
+    font_size = 12
+    margin = 50
+    chunk_size = 64 * 1024
+
+    def _get_font(self):
+        font_path = settings.SHOPPING_LIST_PDF_FONT
+        if not font_path or not os.path.exists(font_path):
+            return "Helvetica"
+        font_name = os.path.splitext(os.path.basename(font_path))[0]
+        if font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(font_name, font_path))
+        return font_name
+
+    def _draw(self, rows):
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self._get_font()
+        _, height = A4
+        line_height = self.font_size * 1.5
+        pdf.setFont(font, self.font_size + 4)
+        pdf.drawString(self.margin, height - self.margin, TITLE)
+        position = height - self.margin - 2 * line_height
+        pdf.setFont(font, self.font_size)
+        for number, (name, amount, measurement_unit) in enumerate(rows, 1):
+            if position < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                position = height - self.margin
+            pdf.drawString(
+                self.margin,
+                position,
+                f"{number}. {name} - {amount} {measurement_unit}",
+            )
+            position -= line_height
+        pdf.save()
+        return buffer
+
+    def stream(self, rows):
+        buffer = self._draw(rows)
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(self.chunk_size), b"")
+
+
+EXPORTERS = [TextExporter, CSVExporter, JSONExporter]
+if canvas is not None:
+    EXPORTERS.append(PDFExporter)
+
+
+def get_accepted_media_types(accept):
+    # Highest quality first, then the more specific type, then the
+    # order of the header.
+    weighted = []
+    for position, value in enumerate(accept.split(",")):
+        media_type = _MediaType(value.strip())
+        try:
+            quality = float(media_type.params.get("q", 1))
+        except ValueError:
+            continue
+        if quality > 0:
+            weighted.append(
+                (
+                    -quality,
+                    -media_type.precedence,
+                    position,
+                    media_type.full_type,
+                )
+            )
+    return [media_type for *_, media_type in sorted(weighted)]
+
+
+def get_exporter(request):
+    requested_format = request.query_params.get("format")
+    if requested_format:
+        for exporter in EXPORTERS:
+            if exporter.format == requested_format:
+                return exporter()
+        raise NotAcceptable(
+            f"Формат {requested_format} не поддерживается"
+        )
+    accept = request.META.get("HTTP_ACCEPT") or "*/*"
+    for media_type in get_accepted_media_types(accept):
+        for exporter in EXPORTERS:
+            if media_type_matches(exporter.media_type, media_type):
+                return exporter()
+    raise NotAcceptable()
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+
+class RenditionImageField(Base64ImageField):
+    def __init__(self, rendition, many_rendition=None, **kwargs):
+        self.rendition = rendition
+        self.many_rendition = many_rendition or rendition
+        super().__init__(**kwargs)
+
+    def _get_rendition(self):
+        if self.parent is not None and isinstance(
+            self.parent.parent, serializers.ListSerializer
+        ):
+            return self.many_rendition
+        return self.rendition
+
+    def to_representation(self, file):
+        if not file:
+            return None
+        renditions = getattr(file.instance, "image_renditions", None) or {}
+        name = renditions.get(self._get_rendition(), {}).get(
+            settings.IMAGE_RENDITION_FORMAT
+        )
+        if name is None:
+            return super().to_representation(file)
+        url = default_storage.url(name)
+        request = self.context.get("request")
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
@@ -0,0 +1,62 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+def _parse_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    # Extra model columns that a serializer field reads besides its source.
+    sparse_columns = {}
+
+    @classmethod
+    def get_selected_fields(cls, request):
+        names = set(cls.Meta.fields)
+        if request is None:
+            return names
+        fields = _parse_names(request, FIELDS_PARAM)
+        omit = _parse_names(request, OMIT_PARAM) or set()
+        for param, requested in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+            unknown = (requested or set()) - names
+            if unknown:
+                raise ValidationError(
+                    {param: f"Неизвестные поля: {', '.join(sorted(unknown))}"}
+                )
+        if fields is not None:
+            names = fields
+        return names - omit
+
+    @classmethod
+    def get_model_columns(cls, selected):
+        meta = cls.Meta.model._meta
+        concrete = {field.name for field in meta.concrete_fields}
+        columns = {meta.pk.name}
+        for name in selected:
+            field = cls._declared_fields.get(name)
+            source = getattr(field, "source", None) or name
+            if source in concrete:
+                columns.add(source)
+            columns.update(cls.sparse_columns.get(name, ()))
+        return columns
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        selected = self.get_selected_fields(self.context.get("request"))
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
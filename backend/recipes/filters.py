@@ -1,25 +1,111 @@
-from django.db.models import IntegerField, Value
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, Exists, IntegerField, OuterRef, Value, When
+from django.db.models.functions import Lower
 from django_filters.rest_framework import FilterSet, filters
 
 from users.models import User
-from .models import Ingredient, Recipe
+from . import cache
+from .models import Ingredient, Recipe, Tag
+from .search import ingredient_index
+
+TAGS_MATCH_ANY = "any"
+TAGS_MATCH_ALL = "all"
+ORDERING_POPULAR = "popular"
+ORDERING_TRENDING = "trending"
+
+
+def uses_trigram_index(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def filter_by_name(queryset, value, lookup="contains"):
+    if not uses_trigram_index(queryset):
+        return queryset.filter(**{f"name__i{lookup}": value})
+    return queryset.alias(lower_name=Lower("name")).filter(
+        **{f"lower_name__{lookup}": value.lower()}
+    )
+
+
+def get_tag_ids_by_slug():
+    return cache.get_or_set(
+        cache.TAGS,
+        "ids_by_slug",
+        lambda: dict(Tag.objects.values_list("slug", "pk")),
+    )
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids_by_slug()]
 
 
 class RecipeFilter(FilterSet):
+    name = filters.CharFilter(method="search_by_name")
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method="filter_tags",
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=(
+            (TAGS_MATCH_ANY, "Хотя бы один из тегов"),
+            (TAGS_MATCH_ALL, "Все теги"),
+        ),
+        method="skip_filter",
+    )
     is_favorited = filters.NumberFilter(method="get_is_favorited")
     is_in_shopping_cart = filters.NumberFilter(
         method="get_is_in_shopping_cart"
     )
+    ordering = filters.ChoiceFilter(
+        choices=(
+            (ORDERING_POPULAR, "По количеству добавлений в избранное"),
+            (ORDERING_TRENDING, "По недавней активности"),
+        ),
+        method="order_recipes",
+    )
 
     class Meta:
         model = Recipe
         fields = (
+            "name",
             "tags",
             "author",
         )
 
+    def search_by_name(self, queryset, name, value):
+        if not value:
+            return queryset
+        return filter_by_name(queryset, value)
+
+    def skip_filter(self, queryset, name, value):
+        return queryset
+
+    def order_recipes(self, queryset, name, value):
+        if value == ORDERING_POPULAR:
+            return queryset.popular()
+        if value == ORDERING_TRENDING:
+            return queryset.trending()
+        return queryset
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        tag_ids = [
+            tag_ids_by_slug[slug] for slug in value if slug in tag_ids_by_slug
+        ]
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef("pk")
+        )
+        if self.form.cleaned_data.get("tags_match") != TAGS_MATCH_ALL:
+            return queryset.filter(
+                Exists(recipe_tags.filter(tag__in=tag_ids))
+            )
+        for tag_id in tag_ids:
+            queryset = queryset.filter(Exists(recipe_tags.filter(tag=tag_id)))
+        return queryset
+
     def if_user_is_anonymous(func):
         def check_user(self, queryset, name, value, *args, **kwargs):
             if self.request.user.is_anonymous:
@@ -51,6 +137,42 @@ class IngredientSearchFilter(FilterSet):
     def search_by_name(self, queryset, name, value):
         if not value:
             return queryset
+        if settings.INGREDIENT_SEARCH_ENGINE == "memory":
+            return self.search_in_index(queryset, value)
+        return self.search_in_database(queryset, value)
+
+    def search_in_index(self, queryset, value):
+        prefix_ids, contains_ids = ingredient_index.search(value)
+        queryset = queryset.filter(pk__in=prefix_ids + contains_ids)
+        if not prefix_ids or not contains_ids:
+            return queryset.order_by("name")
+        if len(prefix_ids) <= len(contains_ids):
+            order = Case(
+                When(pk__in=prefix_ids, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        else:
+            order = Case(
+                When(pk__in=contains_ids, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        return queryset.annotate(order=order).order_by("order", "name")
+
+    def search_in_database(self, queryset, value):
+        if uses_trigram_index(queryset):
+            return (
+                filter_by_name(queryset, value)
+                .annotate(
+                    order=Case(
+                        When(lower_name__startswith=value.lower(), then=0),
+                        default=1,
+                        output_field=IntegerField(),
+                    )
+                )
+                .order_by("order", "name")
+            )
         start_with_queryset = queryset.filter(
             name__istartswith=value
         ).annotate(order=Value(0, IntegerField()))
@@ -0,0 +1,101 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_RENDITION_WORKERS,
+        thread_name_prefix="image-renditions",
+    )
+
+
+def _rendition_name(image_name, rendition, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"recipes/renditions/{stem}_{rendition}.{extension}"
+
+
+def _encode(image, extension):
+    image_format, options = FORMATS[extension]
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def render(image_name):
+    with default_storage.open(image_name, "rb") as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    renditions = {}
+    for rendition, size in settings.IMAGE_RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        renditions[rendition] = {
+            extension: default_storage.save(
+                _rendition_name(image_name, rendition, extension),
+                _encode(image, extension),
+            )
+            for extension in FORMATS
+        }
+    return renditions
+
+
+def delete_renditions(renditions):
+    for files in renditions.values():
+        for name in files.values():
+            default_storage.delete(name)
+
+
+def process_recipe(recipe_id, image_name):
+    try:
+        renditions = render(image_name)
+    except Exception:
+        logger.exception("Не удалось обработать картинку %s", image_name)
+        return False
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_renditions=renditions
+    )
+    if not updated:
+        delete_renditions(renditions)
+    return bool(updated)
+
+
+def _run(recipe_id, image_name):
+    try:
+        process_recipe(recipe_id, image_name)
+    finally:
+        connections.close_all()
+
+
+def schedule(recipe):
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    if not image_name:
+        return
+    if settings.IMAGE_RENDITION_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(_run, recipe_id, image_name)
+        )
+    else:
+        transaction.on_commit(lambda: process_recipe(recipe_id, image_name))
@@ -0,0 +1,90 @@
+import csv
+import time
+from itertools import islice
+
+from django.db import transaction
+
+from . import cache
+from .models import Ingredient
+
+IMPORT_BATCH_SIZE = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.new = 0
+        self.inserted = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def skipped(self):
+        return self.read - self.new
+
+    @property
+    def duration(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self):
+        return self.read / self.duration if self.duration else 0
+
+    def __str__(self):
+        return (
+            f"Прочитано строк: {self.read}, новых: {self.new}, "
+            f"добавлено: {self.inserted}, пропущено: {self.skipped} "
+            f"({self.duration:.2f} с, {self.rate:.0f} строк/с)"
+        )
+
+
+def read_ingredients(file, skip_header=True):
+    reader = csv.reader(file)
+    if skip_header:
+        next(reader, None)
+    for row in reader:
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def import_ingredients(rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    result = ImportResult()
+    seen = set()
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        result.read += len(batch)
+        new_rows = []
+        for row in batch:
+            if row not in seen:
+                seen.add(row)
+                new_rows.append(row)
+        names = {name for name, _ in new_rows}
+        with transaction.atomic():
+            existing = set(
+                Ingredient.objects.filter(name__in=names).values_list(
+                    "name", "measurement_unit"
+                )
+            )
+            new_rows = [row for row in new_rows if row not in existing]
+            result.new += len(new_rows)
+            if not new_rows or dry_run:
+                continue
+            # ignore_conflicts hides rows added by a concurrent import, so
+            # only rows that really appeared are counted.
+            batch_ingredients = Ingredient.objects.filter(name__in=names)
+            before = batch_ingredients.count()
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in new_rows
+                ),
+                ignore_conflicts=True,
+            )
+            result.inserted += batch_ingredients.count() - before
+    result.finished = time.monotonic()
+    if result.inserted:
+        cache.invalidate(cache.INGREDIENTS)
+    return result
@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.filters import IngredientSearchFilter
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+
+class Command(BaseCommand):
+    help = "Compare ingredient search latency: in-memory index vs ORM"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _make_queries(self, names, count, seed):
+        rng = random.Random(seed)
+        queries = []
+        for _ in range(count):
+            name = rng.choice(names)
+            length = rng.randint(1, min(6, len(name)))
+            start = rng.choice((0, rng.randrange(len(name) - length + 1)))
+            queries.append(name[start:start + length])
+        return queries
+
+    def _measure(self, search, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def handle(self, *args, **options):
+        if options["queries"] < 2:
+            raise CommandError("Нужно не меньше двух запросов (--queries)")
+        names = list(Ingredient.objects.values_list("name", flat=True))
+        if not names:
+            raise CommandError(
+                "Нет ингредиентов, запустите import_ingredients"
+            )
+        queries = self._make_queries(
+            names, options["queries"], options["seed"]
+        )
+        filterset = IngredientSearchFilter(queryset=Ingredient.objects.all())
+        ingredient_index.refresh()
+        paths = (
+            ("index", ingredient_index.search),
+            (
+                "index + fetch",
+                lambda query: list(
+                    filterset.search_in_index(Ingredient.objects.all(), query)
+                ),
+            ),
+            (
+                "orm",
+                lambda query: list(
+                    filterset.search_in_database(
+                        Ingredient.objects.all(), query
+                    )
+                ),
+            ),
+        )
+        self.stdout.write(
+            f"{len(names)} ingredients, {len(queries)} queries, ms"
+        )
+        self.stdout.write(f"{'path':<16}{'mean':>10}{'p50':>10}{'p95':>10}")
+        for label, search in paths:
+            timings = self._measure(search, queries)
+            percentiles = statistics.quantiles(timings, n=20)
+            self.stdout.write(
+                f"{label:<16}{statistics.mean(timings):>10.3f}"
+                f"{statistics.median(timings):>10.3f}"
+                f"{percentiles[18]:>10.3f}"
+            )
@@ -0,0 +1,297 @@
+import random
+import time
+from io import BytesIO
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from PIL import Image
+
+from recipes.importers import import_ingredients
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+IMAGE_NAME = "recipes/images/load_data.jpg"
+TAGS = (
+    ("Завтрак", "#0076FF", "breakfast"),
+    ("Обед", "#FFCE26", "lunch"),
+    ("Ужин", "#9922C8", "dinner"),
+    ("Десерты", "#F890E7", "dessert"),
+    ("Выпечка", "#874E24", "baked_goods"),
+)
+UNITS = ("г", "кг", "мл", "л", "шт.", "ст. л.", "ч. л.", "стакан")
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500)
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Павел", "Елена", "Олег", "Ольга")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев")
+ADJECTIVES = (
+    "Домашний", "Быстрый", "Пряный", "Летний", "Осенний", "Сырный",
+    "Острый", "Сливочный", "Овощной", "Бабушкин",
+)
+DISHES = (
+    "суп", "салат", "пирог", "омлет", "плов", "соус", "гуляш", "десерт",
+    "кекс", "рулет",
+)
+SENTENCES = (
+    "Подготовьте все ингредиенты.",
+    "Нарежьте овощи небольшими кубиками.",
+    "Разогрейте духовку до 180 градусов.",
+    "Перемешайте до однородной массы.",
+    "Готовьте на среднем огне 15 минут.",
+    "Посолите и поперчите по вкусу.",
+    "Подавайте горячим.",
+    "Дайте настояться 10 минут.",
+)
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic dataset for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--favorites-per-user", type=int, default=10)
+        parser.add_argument("--subscriptions-per-user", type=int, default=5)
+        parser.add_argument("--cart-per-user", type=int, default=0)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=6)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def _bulk_create(self, model, objects):
+        objects = iter(objects)
+        created = []
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return created
+            created.extend(model.objects.bulk_create(batch))
+
+    def _insert_rows(self, model, fields, rows):
+        quote_name = connection.ops.quote_name
+        columns = [model._meta.get_field(field).column for field in fields]
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote_name(model._meta.db_table),
+            ", ".join(quote_name(column) for column in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        rows = iter(rows)
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return count
+                cursor.executemany(sql, batch)
+                count += len(batch)
+
+    def _report(self, label, count, started):
+        duration = time.monotonic() - started
+        self.stdout.write(
+            f"{label}: {count} ({duration:.1f} с, "
+            f"{count / duration if duration else 0:.0f} в секунду)"
+        )
+
+    def _get_image(self):
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = BytesIO()
+            Image.new("RGB", (1200, 800), "#F4A460").save(buffer, "JPEG")
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+        return IMAGE_NAME
+
+    def _get_ingredient_ids(self):
+        if not Ingredient.objects.exists():
+            import_ingredients(
+                (
+                    (f"ингредиент {number}", UNITS[number % len(UNITS)])
+                    for number in range(1000)
+                ),
+                batch_size=self.batch_size,
+            )
+        return list(Ingredient.objects.values_list("pk", flat=True))
+
+    def _get_tag_ids(self):
+        Tag.objects.bulk_create(
+            (
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in TAGS
+            ),
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.values_list("pk", flat=True))
+
+    def _create_users(self, count):
+        password = make_password(None)
+        return [
+            user.pk
+            for user in self._bulk_create(
+                User,
+                (
+                    User(
+                        username=f"{self.prefix}{number}",
+                        email=f"{self.prefix}{number}@example.com",
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                        password=password,
+                    )
+                    for number in range(count)
+                ),
+            )
+        ]
+
+    def _get_ingredient_amount_ids(self, pairs):
+        missing = pairs - self.ingredient_amounts.keys()
+        if not missing:
+            return
+        IngredientAmount.objects.bulk_create(
+            (
+                IngredientAmount(ingredient_id=ingredient_id, amount=amount)
+                for ingredient_id, amount in missing
+            ),
+            ignore_conflicts=True,
+        )
+        for pk, ingredient_id, amount in IngredientAmount.objects.filter(
+            ingredient__in={ingredient_id for ingredient_id, _ in missing},
+            amount__in={amount for _, amount in missing},
+        ).values_list("pk", "ingredient", "amount"):
+            self.ingredient_amounts[ingredient_id, amount] = pk
+
+    @transaction.atomic
+    def _create_recipe_batch(self, author_ids, tag_ids, ingredient_ids, size):
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=self.random.choice(author_ids),
+                name=(
+                    f"{self.random.choice(ADJECTIVES)} "
+                    f"{self.random.choice(DISHES)}"
+                ),
+                image=self.image,
+                text=" ".join(self.random.sample(SENTENCES, 4)),
+                cooking_time=self.random.randint(5, 180),
+            )
+            for _ in range(size)
+        )
+        recipe_tags = []
+        recipe_ingredients = {}
+        for recipe in recipes:
+            for tag_id in self.random.sample(
+                tag_ids, self.random.randint(1, min(2, len(tag_ids)))
+            ):
+                recipe_tags.append((recipe.pk, tag_id))
+            recipe_ingredients[recipe.pk] = {
+                (ingredient_id, self.random.choice(AMOUNTS))
+                for ingredient_id in self.random.sample(
+                    ingredient_ids,
+                    min(self.ingredients_per_recipe, len(ingredient_ids)),
+                )
+            }
+        self._get_ingredient_amount_ids(
+            set().union(*recipe_ingredients.values())
+        )
+        self._insert_rows(
+            Recipe.tags.through, ("recipe", "tag"), recipe_tags
+        )
+        self._insert_rows(
+            Recipe.ingredients.through,
+            ("recipe", "ingredientamount"),
+            (
+                (recipe_id, self.ingredient_amounts[pair])
+                for recipe_id, pairs in recipe_ingredients.items()
+                for pair in pairs
+            ),
+        )
+        return [recipe.pk for recipe in recipes]
+
+    def _sample_targets(self, user_id, field, target_ids, per_user):
+        if field != "author":
+            return self.random.sample(target_ids, per_user)
+        sample = self.random.sample(
+            target_ids, min(per_user + 1, len(target_ids))
+        )
+        return [pk for pk in sample if pk != user_id][:per_user]
+
+    def _create_links(self, model, field, user_ids, target_ids, per_user):
+        per_user = min(per_user, len(target_ids))
+        if not per_user:
+            return 0
+        return self._insert_rows(
+            model,
+            ("user", field),
+            (
+                (user_id, target_id)
+                for user_id in user_ids
+                for target_id in self._sample_targets(
+                    user_id, field, target_ids, per_user
+                )
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.ingredients_per_recipe = options["ingredients_per_recipe"]
+        self.prefix = f"load_{options['seed']}_"
+        self.ingredient_amounts = {}
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(
+                f"Данные с seed={options['seed']} уже созданы"
+            )
+
+        started = time.monotonic()
+        self.image = self._get_image()
+        tag_ids = self._get_tag_ids()
+        ingredient_ids = self._get_ingredient_ids()
+        user_ids = self._create_users(options["users"])
+        self._report("Пользователи", len(user_ids), started)
+
+        started = time.monotonic()
+        recipe_ids = []
+        while len(recipe_ids) < options["recipes"]:
+            recipe_ids.extend(
+                self._create_recipe_batch(
+                    user_ids,
+                    tag_ids,
+                    ingredient_ids,
+                    min(self.batch_size, options["recipes"] - len(recipe_ids)),
+                )
+            )
+        self._report("Рецепты", len(recipe_ids), started)
+
+        for label, model, field, target_ids, per_user in (
+            (
+                "Избранное",
+                Favorite,
+                "recipe",
+                recipe_ids,
+                options["favorites_per_user"],
+            ),
+            (
+                "Подписки",
+                Subscription,
+                "author",
+                user_ids,
+                options["subscriptions_per_user"],
+            ),
+            (
+                "Корзины",
+                ShoppingCart,
+                "recipe",
+                recipe_ids,
+                options["cart_per_user"],
+            ),
+        ):
+            started = time.monotonic()
+            count = self._create_links(
+                model, field, user_ids, target_ids, per_user
+            )
+            self._report(label, count, started)
+        if options["cart_per_user"]:
+            call_command("rebuild_shopping_lists", stdout=self.stdout)
+        call_command(
+            "reconcile_counters",
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
@@ -1,19 +1,26 @@
-import csv
-
 from django.core.management.base import BaseCommand
 
-from recipes.models import Ingredient
+from recipes.importers import (IMPORT_BATCH_SIZE, import_ingredients,
+                               read_ingredients)
 
 
 class Command(BaseCommand):
-    help = "Import Users from `../data/ingredients.csv`"
+    help = "Import ingredients from `data/ingredients.csv`"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="data/ingredients.csv"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+        )
+        parser.add_argument("--dry-run", action="store_true")
 
-    def handle(self, *args, **kwargs):
-        with open("data/ingredients.csv", encoding="utf-8") as csvfile:
-            csvreader = csv.reader(csvfile)
-            next(csvreader)
-            for row in csvreader:
-                Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measurement_unit=row[1],
-                )
+    def handle(self, *args, **options):
+        with open(options["path"], encoding="utf-8") as csvfile:
+            result = import_ingredients(
+                read_ingredients(csvfile),
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+        self.stdout.write(self.style.SUCCESS(str(result)))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes import images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Generate image renditions for recipes that do not have them yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate renditions for every recipe",
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image="")
+        if not options["all"]:
+            recipes = recipes.filter(image_renditions={})
+        processed = failed = 0
+        for recipe_id, image_name, renditions in recipes.values_list(
+            "pk", "image", "image_renditions"
+        ).iterator():
+            if images.process_recipe(recipe_id, image_name):
+                images.delete_renditions(renditions)
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработано картинок: {processed}, с ошибками: {failed}"
+            )
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+
+from recipes.models import IngredientAmount
+
+
+class Command(BaseCommand):
+    help = "Delete ingredient amounts that no recipe refers to"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = IngredientAmount.objects.orphans().count()
+            self.stdout.write(f"Будет удалено записей: {count}")
+            return
+        deleted = 0
+        while True:
+            try:
+                with transaction.atomic():
+                    # Rows locked by a recipe being saved are skipped,
+                    # they will not be orphans once it commits.
+                    batch = list(
+                        IngredientAmount.objects.orphans()
+                        .select_for_update(skip_locked=True, of=("self",))
+                        .order_by("pk")
+                        .values_list("pk", flat=True)[:options["batch_size"]]
+                    )
+                    if not batch:
+                        break
+                    count, _ = IngredientAmount.objects.filter(
+                        pk__in=batch
+                    ).orphans().delete()
+            except IntegrityError:
+                # A recipe linked a row of the batch in the meantime,
+                # the next lookup no longer sees it as an orphan.
+                continue
+            deleted += count
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено записей: {deleted}")
+        )
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized shopping lists from shopping carts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report users whose shopping list has drifted",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def _user_batches(self, batch_size):
+        last_id = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
+
+    def _find_drifted(self, user_ids):
+        expected = ShoppingListItem.objects.cart_amounts(user_ids)
+        stored = defaultdict(dict)
+        for user_id, ingredient_id, amount in ShoppingListItem.objects.filter(
+            user__in=user_ids
+        ).values_list("user", "ingredient", "amount"):
+            stored[user_id][ingredient_id] = amount
+        return {
+            user_id: expected.get(user_id, {})
+            for user_id in user_ids
+            if expected.get(user_id, {}) != stored.get(user_id, {})
+        }
+
+    @transaction.atomic
+    def _rebuild(self, drifted):
+        ShoppingListItem.objects.filter(user__in=drifted).delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for user_id, amounts in drifted.items()
+            for ingredient_id, amount in amounts.items()
+        )
+
+    def handle(self, *args, **options):
+        checked = 0
+        drifted_count = 0
+        for user_ids in self._user_batches(options["batch_size"]):
+            drifted = self._find_drifted(user_ids)
+            checked += len(user_ids)
+            drifted_count += len(drifted)
+            if drifted and not options["verify"]:
+                self._rebuild(drifted)
+        if options["verify"] and drifted_count:
+            raise CommandError(
+                f"Списки покупок расходятся с корзинами у {drifted_count} "
+                f"из {checked} пользователей"
+            )
+        action = "проверены" if options["verify"] else "пересобраны"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Списки покупок {action}: пользователей {checked}, "
+                f"исправлено {0 if options['verify'] else drifted_count}"
+            )
+        )
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.counters import count_subquery, reconcile_counters
+from recipes.models import Favorite, Recipe, RecipeScore, ShoppingCart
+from recipes.scores import initial_score
+from users.models import Subscription, User, UserStats
+
+
+class Command(BaseCommand):
+    help = "Repair drift in the denormalized recipe and user counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def create_missing(self, model, missing, build, batch_size, dry_run):
+        if dry_run:
+            return missing.count()
+        created = 0
+        while True:
+            batch = list(missing.order_by("pk")[:batch_size])
+            if not batch:
+                return created
+            model.objects.bulk_create(
+                [build(row) for row in batch],
+                ignore_conflicts=True,
+            )
+            created += len(batch)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        now = timezone.now()
+        created = self.create_missing(
+            UserStats,
+            User.objects.filter(stats=None).only("pk"),
+            lambda user: UserStats(user_id=user.pk),
+            batch_size,
+            dry_run,
+        )
+        recipes = reconcile_counters(
+            Recipe.objects.all(),
+            {
+                "favorites_count": count_subquery(
+                    Favorite.objects.all(), "recipe"
+                ),
+                "shopping_cart_count": count_subquery(
+                    ShoppingCart.objects.all(), "recipe"
+                ),
+            },
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+        users = reconcile_counters(
+            UserStats.objects.all(),
+            {
+                "recipes_count": count_subquery(
+                    Recipe.objects.all(), "author", "user_id"
+                ),
+                "subscribers_count": count_subquery(
+                    Subscription.objects.all(), "author", "user_id"
+                ),
+            },
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+        scores = self.create_missing(
+            RecipeScore,
+            Recipe.objects.filter(score=None).only(
+                "pk", "favorites_count", "shopping_cart_count"
+            ),
+            lambda recipe: RecipeScore(
+                recipe_id=recipe.pk,
+                trending=initial_score(
+                    recipe.favorites_count, recipe.shopping_cart_count, now
+                ),
+            ),
+            batch_size,
+            dry_run,
+        )
+        prefix = "Будет исправлено" if dry_run else "Исправлено"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} рецептов: {recipes}, пользователей: {users}, "
+                f"недостающих записей статистики: {created}, "
+                f"рейтингов: {scores}"
+            )
+        )
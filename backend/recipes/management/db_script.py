@@ -1,9 +1,8 @@
-import csv
-
 from django.conf import settings
 from django.core.management import BaseCommand
 
-from recipes.models import Ingredient, Tag
+from recipes.importers import import_ingredients, read_ingredients
+from recipes.models import Tag
 
 
 class Command(BaseCommand):
@@ -14,13 +13,9 @@ class Command(BaseCommand):
             "r",
             encoding="utf-8",
         ) as file:
-            file_reader = csv.reader(file)
-            for row in file_reader:
-                name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit)
-            file.close()
+            result = import_ingredients(
+                read_ingredients(file, skip_header=False)
+            )
 
         tags = (
             ('Завтрак', '#0076FF', 'breakfast'),
@@ -35,4 +30,5 @@ class Command(BaseCommand):
                 color=color,
                 slug=slug
             )
+        self.stdout.write(self.style.SUCCESS(str(result)))
         self.stdout.write(self.style.SUCCESS('Ингредиенты и тэги добавлены'))
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    ("recipes_ingredient_name_trgm", "recipes_ingredient"),
+    ("recipes_recipe_name_trgm", "recipes_recipe"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, table in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} "
+            "USING gin (lower(name) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
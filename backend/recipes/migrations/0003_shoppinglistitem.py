@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    ShoppingListItem = apps.get_model("recipes", "ShoppingListItem")
+    totals = defaultdict(int)
+    for user_id, ingredient_id, total in (
+        ShoppingCart.objects.filter(recipe__ingredients__isnull=False)
+        .values("user", "recipe__ingredients__ingredient")
+        .annotate(total=Sum("recipe__ingredients__amount"))
+        .values_list("user", "recipe__ingredients__ingredient", "total")
+        .order_by()
+    ):
+        totals[user_id, ingredient_id] += total
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for (user_id, ingredient_id), amount in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0002_name_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.PositiveIntegerField(verbose_name="Количество"),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="recipes.ingredient",
+                        verbose_name="Ингредиент",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Позиция списка покупок",
+                "verbose_name_plural": "Список покупок",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppinglistitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="unique_shoppinglistitem_user_ingredient",
+            ),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredient_amounts(apps, schema_editor):
+    IngredientAmount = apps.get_model("recipes", "IngredientAmount")
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = Recipe.ingredients.through
+    duplicates = (
+        IngredientAmount.objects.values("ingredient", "amount")
+        .annotate(keep_id=Min("id"), rows=Count("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate["keep_id"]
+        duplicate_ids = list(
+            IngredientAmount.objects.filter(
+                ingredient=duplicate["ingredient"],
+                amount=duplicate["amount"],
+            )
+            .exclude(id=keep_id)
+            .values_list("id", flat=True)
+        )
+        for link in RecipeIngredient.objects.filter(
+            ingredientamount_id__in=duplicate_ids
+        ):
+            if RecipeIngredient.objects.filter(
+                recipe_id=link.recipe_id,
+                ingredientamount_id=keep_id,
+            ).exists():
+                link.delete()
+            else:
+                link.ingredientamount_id = keep_id
+                link.save(update_fields=["ingredientamount_id"])
+        IngredientAmount.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_shoppinglistitem"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredient_amounts,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_merge_duplicate_ingredient_amounts"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="ingredientamount",
+            constraint=models.UniqueConstraint(
+                fields=("ingredient", "amount"),
+                name="unique_ingredientamount_ingredient_amount",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef("pk"))
+            .order_by()
+            .values("recipe")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def fill_recipe_counters(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Favorite = apps.get_model("recipes", "Favorite")
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite),
+        shopping_cart_count=count_subquery(ShoppingCart),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_recipe_image_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="shopping_cart_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В корзине"
+            ),
+        ),
+        migrations.RunPython(
+            fill_recipe_counters,
+            migrations.RunPython.noop,
+        ),
+    ]
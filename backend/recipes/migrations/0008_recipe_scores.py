@@ -0,0 +1,97 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+# A frozen copy of recipes.scores at the time of this migration.
+EPOCH = datetime(2022, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def initial_score(favorites_count, shopping_cart_count, moment):
+    weights = settings.RECIPE_TRENDING
+    weight = (
+        weights["RECIPE_WEIGHT"]
+        + weights["FAVORITE_WEIGHT"] * favorites_count
+        + weights["SHOPPING_CART_WEIGHT"] * shopping_cart_count
+    )
+    if weight <= 0:
+        return 0.0
+    half_life = weights["HALF_LIFE_HOURS"] * 3600
+    return math.log(weight) + (
+        math.log(2) * (moment - EPOCH).total_seconds() / half_life
+    )
+
+
+def fill_recipe_scores(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeScore = apps.get_model("recipes", "RecipeScore")
+    # Past events have no timestamps, so they are all counted as
+    # happening now.
+    now = timezone.now()
+    scores = (
+        RecipeScore(
+            recipe_id=recipe_id,
+            trending=initial_score(favorites_count, shopping_cart_count, now),
+        )
+        for recipe_id, favorites_count, shopping_cart_count in (
+            Recipe.objects.values_list(
+                "id", "favorites_count", "shopping_cart_count"
+            ).iterator(chunk_size=BATCH_SIZE)
+        )
+    )
+    RecipeScore.objects.bulk_create(scores, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeScore",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="score",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "trending",
+                    models.FloatField(verbose_name="Актуальность"),
+                ),
+            ],
+            options={
+                "verbose_name": "Рейтинг рецепта",
+                "verbose_name_plural": "Рейтинги рецептов",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-favorites_count", "-id"],
+                name="recipe_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipescore",
+            index=models.Index(
+                fields=["-trending"], name="recipescore_trending_idx"
+            ),
+        ),
+        migrations.RunPython(
+            fill_recipe_scores,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -1,7 +1,12 @@
+from collections import defaultdict
+
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, F, Sum, When, Window
+from django.db.models.functions import Greatest, RowNumber
 
 from users.models import User
+from .scores import add_score, event_score
 
 
 class Tag(models.Model):
@@ -63,6 +68,40 @@ class Ingredient(models.Model):
         return f"{self.name}, {self.measurement_unit}"
 
 
+class IngredientAmountQuerySet(models.QuerySet):
+    def bulk_get_or_create(self, pairs):
+        # The rows stay locked until the caller's transaction ends, so
+        # purge_orphan_ingredient_amounts skips them. Rows it deleted
+        # between the insert and the lock are inserted again.
+        missing = set(pairs)
+        amounts = []
+        with transaction.atomic(savepoint=False):
+            while missing:
+                self.bulk_create(
+                    (
+                        IngredientAmount(
+                            ingredient_id=ingredient_id, amount=amount
+                        )
+                        for ingredient_id, amount in missing
+                    ),
+                    ignore_conflicts=True,
+                )
+                condition = models.Q()
+                for ingredient_id, amount in missing:
+                    condition |= models.Q(
+                        ingredient_id=ingredient_id, amount=amount
+                    )
+                found = list(self.filter(condition).select_for_update())
+                amounts.extend(found)
+                missing -= {
+                    (amount.ingredient_id, amount.amount) for amount in found
+                }
+        return amounts
+
+    def orphans(self):
+        return self.filter(recipes=None)
+
+
 class IngredientAmount(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
@@ -71,14 +110,62 @@ class IngredientAmount(models.Model):
     )
     amount = models.PositiveIntegerField(verbose_name="Количество")
 
+    objects = IngredientAmountQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Количество ингридиента"
         verbose_name_plural = "Количество ингридиентов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=(
+                    "ingredient",
+                    "amount",
+                ),
+                name="unique_ingredientamount_ingredient_amount",
+            )
+        ]
 
     def __str__(self):
         return f"{self.ingredient} * {self.amount}"
 
 
+class RecipeQuerySet(models.QuerySet):
+    def popular(self):
+        return self.order_by("-favorites_count", "-id")
+
+    def trending(self):
+        # The inner join lets the database walk recipescore_trending_idx.
+        # Every recipe gets a score row on creation, and
+        # reconcile_counters adds the ones created in bypass of signals.
+        return self.filter(score__isnull=False).order_by(
+            "-score__trending", "-id"
+        )
+
+    def latest_by_author(self, author_ids, limit=None):
+        queryset = self.filter(author_id__in=author_ids).order_by(
+            "author_id", "-id"
+        )
+        if limit is None:
+            return list(queryset)
+        if not author_ids:
+            return []
+        ranked = queryset.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F("author_id"),
+                order_by=F("id").desc(),
+            )
+        )
+        sql, params = ranked.query.get_compiler(self.db).as_sql()
+        return list(
+            self.raw(
+                f"SELECT * FROM ({sql}) ranked WHERE row_number <= %s "
+                "ORDER BY author_id, id DESC",
+                (*params, limit),
+            ).using(self.db)
+        )
+
+
 class Recipe(models.Model):
     tags = models.ManyToManyField(
         Tag,
@@ -103,20 +190,85 @@ class Recipe(models.Model):
         upload_to="recipes/images/",
         verbose_name="Картинка",
     )
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Уменьшенные копии картинки",
+    )
     text = models.TextField(verbose_name="Описание")
     cooking_time = models.PositiveIntegerField(
         validators=[MinValueValidator(1)],
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном",
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В корзине",
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ("-id",)
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=("-favorites_count", "-id"),
+                name="recipe_popular_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
 
 
+class RecipeScoreQuerySet(models.QuerySet):
+    def add_event(self, recipe_id, weight, moment=None):
+        score = event_score(weight, moment)
+        if score is None:
+            return
+        if self.filter(recipe_id=recipe_id).update(
+            trending=add_score("trending", score)
+        ):
+            return
+        self.bulk_create(
+            [RecipeScore(recipe_id=recipe_id, trending=score)],
+            ignore_conflicts=True,
+        )
+
+
+class RecipeScore(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="score",
+        verbose_name="Рецепт",
+    )
+    trending = models.FloatField(verbose_name="Актуальность")
+
+    objects = RecipeScoreQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Рейтинг рецепта"
+        verbose_name_plural = "Рейтинги рецептов"
+        indexes = [
+            models.Index(
+                fields=("-trending",),
+                name="recipescore_trending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe}: {self.trending}"
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -178,3 +330,160 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.user} добавил рецепт {self.recipe}"
+
+
+UPSERT_BATCH_SIZE = 500
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    def recipe_amounts(self, recipe_id):
+        return dict(
+            IngredientAmount.objects.filter(recipes=recipe_id)
+            .values("ingredient")
+            .annotate(total=Sum("amount"))
+            .values_list("ingredient", "total")
+        )
+
+    def cart_amounts(self, user_ids=None):
+        carts = ShoppingCart.objects.filter(recipe__ingredients__isnull=False)
+        if user_ids is not None:
+            carts = carts.filter(user__in=user_ids)
+        amounts = defaultdict(dict)
+        for user_id, ingredient_id, total in (
+            carts.values("user", "recipe__ingredients__ingredient")
+            .annotate(total=Sum("recipe__ingredients__amount"))
+            .values_list("user", "recipe__ingredients__ingredient", "total")
+            .order_by()
+        ):
+            amounts[user_id][ingredient_id] = total
+        return amounts
+
+    def _add_amounts(self, user_ids, delta):
+        # INSERT ... ON CONFLICT DO UPDATE adds to an existing row or
+        # creates it in one statement, so two first-time adds of the same
+        # ingredient cannot both try to insert it.
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        user, ingredient, amount = (
+            quote_name(self.model._meta.get_field(name).column)
+            for name in ("user", "ingredient", "amount")
+        )
+        rows = [
+            (user_id, ingredient_id, value)
+            for user_id in user_ids
+            for ingredient_id, value in delta.items()
+        ]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                batch = rows[start:start + UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    f"INSERT INTO {table} ({user}, {ingredient}, {amount}) "
+                    f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                    f"ON CONFLICT ({user}, {ingredient}) DO UPDATE "
+                    f"SET {amount} = {table}.{amount} + EXCLUDED.{amount}",
+                    [value for row in batch for value in row],
+                )
+
+    def apply_delta(self, user_ids, delta):
+        delta = {
+            ingredient_id: amount
+            for ingredient_id, amount in delta.items()
+            if amount
+        }
+        if not user_ids or not delta:
+            return
+        added = {
+            ingredient_id: amount
+            for ingredient_id, amount in delta.items()
+            if amount > 0
+        }
+        removed = {
+            ingredient_id: amount
+            for ingredient_id, amount in delta.items()
+            if amount < 0
+        }
+        with transaction.atomic(using=self.db):
+            if removed:
+                items = self.filter(user__in=user_ids, ingredient__in=removed)
+                items.update(
+                    amount=Greatest(
+                        F("amount")
+                        + Case(
+                            *(
+                                When(ingredient=ingredient_id, then=amount)
+                                for ingredient_id, amount in removed.items()
+                            ),
+                            output_field=models.IntegerField(),
+                        ),
+                        0,
+                    )
+                )
+                items.filter(amount=0).delete()
+            if added:
+                self._add_amounts(user_ids, added)
+
+    def add_recipe(self, user_id, recipe_id):
+        self.apply_delta([user_id], self.recipe_amounts(recipe_id))
+
+    def remove_recipe(self, user_id, recipe_id):
+        self.apply_delta(
+            [user_id],
+            {
+                ingredient_id: -amount
+                for ingredient_id, amount in self.recipe_amounts(
+                    recipe_id
+                ).items()
+            },
+        )
+
+    def update_recipe(self, recipe_id, old_amounts, new_amounts):
+        delta = {
+            ingredient_id: (
+                new_amounts.get(ingredient_id, 0)
+                - old_amounts.get(ingredient_id, 0)
+            )
+            for ingredient_id in old_amounts.keys() | new_amounts.keys()
+            if new_amounts.get(ingredient_id) != old_amounts.get(ingredient_id)
+        }
+        if not delta:
+            return
+        user_ids = list(
+            ShoppingCart.objects.filter(recipe=recipe_id).values_list(
+                "user", flat=True
+            )
+        )
+        self.apply_delta(user_ids, delta)
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name="Ингредиент",
+    )
+    amount = models.PositiveIntegerField(verbose_name="Количество")
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Список покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=(
+                    "user",
+                    "ingredient",
+                ),
+                name="unique_shoppinglistitem_user_ingredient",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.ingredient} * {self.amount}"
@@ -1,6 +1,208 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import uuid
+from collections import OrderedDict
+from functools import cached_property, partial
+from urllib.parse import urlencode
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
-class RecipePagination(PageNumberPagination):
+EXACT = "exact"
+CACHED = "cached"
+APPROXIMATE = "approximate"
+COUNT_VERSION_KEY = "pagination:count:version"
+USER_COUNT_VERSION_KEY = "pagination:count:user:{}:version"
+
+
+def _count_version_key(user_id=None):
+    if user_id is None:
+        return COUNT_VERSION_KEY
+    return USER_COUNT_VERSION_KEY.format(user_id)
+
+
+def get_count_version(user_id=None):
+    return cache.get_or_set(
+        _count_version_key(user_id), uuid.uuid4().hex, None
+    )
+
+
+def invalidate_counts(user_id=None):
+    # Without a user every list is dropped, with a user only the lists
+    # that depend on them. The version is dropped again on commit, so a
+    # count read just before the commit cannot be kept.
+    key = _count_version_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.has_filters():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class CountingPaginator(Paginator):
+    def __init__(self, object_list, per_page, count_function, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_function = count_function
+
+    @cached_property
+    def count(self):
+        return self.count_function(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Cached and estimated counts may lag behind the table, so a
+            # missing page is checked again against the exact count.
+            count = self.count_function(self.object_list, exact=True)
+            if count == self.count:
+                raise
+        self.count = count
+        self.__dict__.pop("num_pages", None)
+        return super().validate_number(number)
+
+
+class CountModePagination(PageNumberPagination):
+    count_mode = EXACT
+    approximate_count_threshold = 10000
+    user_query_params = ("is_favorited", "is_in_shopping_cart")
+
+    def count_depends_on_user(self, request, view):
+        return getattr(view, "pagination_count_per_user", False) or any(
+            param in request.query_params for param in self.user_query_params
+        )
+
+    def get_count_cache_key(self, request, view):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in (self.page_query_param, self.page_size_query_param)
+            for value in values
+        )
+        version = get_count_version()
+        if self.count_depends_on_user(request, view):
+            user_id = request.user.pk
+            version = f"{version}:{user_id}:{get_count_version(user_id)}"
+        digest = hashlib.md5(
+            f"{request.path}:{urlencode(params)}".encode()
+        ).hexdigest()
+        return f"pagination:count:{version}:{digest}"
+
+    def get_count(self, queryset, mode, request, view, exact=False):
+        if exact:
+            return queryset.count()
+        if mode == APPROXIMATE:
+            estimate = estimate_count(queryset)
+            if (
+                estimate is not None
+                and estimate >= self.approximate_count_threshold
+            ):
+                return estimate
+            mode = CACHED
+        if mode == CACHED:
+            return cache.get_or_set(
+                self.get_count_cache_key(request, view),
+                queryset.count,
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+            )
+        return queryset.count()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = getattr(view, "pagination_count_mode", self.count_mode)
+        self.django_paginator_class = partial(
+            CountingPaginator,
+            count_function=partial(
+                self.get_count, mode=mode, request=request, view=view
+            ),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeCursorPagination(CursorPagination):
     page_size = 6
     page_size_query_param = "limit"
+    max_page_size = 100
+    ordering = "-id"
+    count_query_param = "count"
+    approximate_count_limit = 1000
+
+    def get_count(self, queryset, request):
+        # Returns the count and whether it was cut at the limit.
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return queryset.count(), False
+        if mode == "approximate":
+            limit = self.approximate_count_limit
+            count = queryset.order_by()[:limit + 1].count()
+            return min(count, limit), count > limit
+        return None, False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_capped = self.get_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+            response["count_capped"] = self.count_capped
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+
+class RecipePagination(CountModePagination):
+    page_size = 6
+    page_size_query_param = "limit"
+    pagination_query_param = "pagination"
+    ordering_query_param = "ordering"
+    cursor_pagination_class = RecipeCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            if request.query_params.get(self.ordering_query_param):
+                raise ValidationError(
+                    {
+                        self.ordering_query_param: (
+                            "Курсорная пагинация поддерживает только "
+                            "сортировку по умолчанию."
+                        )
+                    }
+                )
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
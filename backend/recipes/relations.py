@@ -0,0 +1,185 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+
+def to_pk(model, value):
+    try:
+        return model._meta.pk.to_python(value)
+    except ValidationError:
+        raise Http404
+
+
+def _prepare(model, values, connection):
+    fields = [model._meta.get_field(name) for name in values]
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    params = [
+        field.get_db_prep_save(value, connection)
+        for field, value in zip(fields, values.values())
+    ]
+    return columns, params
+
+
+ADDED = "added"
+ALREADY_ADDED = "already_added"
+REMOVED = "removed"
+NOT_ADDED = "not_added"
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+
+
+def _build(model, using, pk, values):
+    instance = model(pk=pk, **values)
+    instance._state.adding = False
+    instance._state.db = using
+    return instance
+
+
+def add_relations(model, rows):
+    # One INSERT ... ON CONFLICT DO NOTHING instead of exists() + create(),
+    # so concurrent requests cannot trip the unique constraint. Signals
+    # are sent by hand to keep counters and shopping lists up to date.
+    if not rows:
+        return []
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    names = list(rows[0])
+    columns, params = [], []
+    for row in rows:
+        columns, row_params = _prepare(model, row, connection)
+        params.extend(row_params)
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    sql = (
+        f"INSERT INTO {quote_name(model._meta.db_table)} "
+        f"({', '.join(columns)}) "
+        f"VALUES {', '.join([placeholders] * len(rows))} "
+        f"ON CONFLICT DO NOTHING "
+        f"RETURNING {quote_name(model._meta.pk.column)}, {', '.join(columns)}"
+    )
+    with transaction.atomic(using=using):
+        try:
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    instances = [
+                        _build(model, using, pk, dict(zip(names, values)))
+                        for pk, *values in cursor.fetchall()
+                    ]
+                # Foreign keys are deferred until commit. Checking them now
+                # turns a recipe or author deleted concurrently into a 404
+                # instead of an IntegrityError at the end of the request.
+                connection.check_constraints(
+                    table_names=[model._meta.db_table]
+                )
+        except IntegrityError:
+            raise Http404
+        for instance in instances:
+            post_save.send(
+                sender=model,
+                instance=instance,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=using,
+            )
+    return instances
+
+
+def remove_relations(model, values, field=None, targets=()):
+    # One DELETE ... RETURNING instead of exists() + delete(). Only
+    # post_delete is sent: the rows are gone before their instances exist.
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    names = list(values)
+    columns, params = _prepare(model, values, connection)
+    conditions = [f"{column} = %s" for column in columns]
+    if field is not None:
+        if not targets:
+            return []
+        names.append(field)
+        column = quote_name(model._meta.get_field(field).column)
+        columns.append(column)
+        conditions.append(
+            f"{column} IN ({', '.join(['%s'] * len(targets))})"
+        )
+        params.extend(targets)
+    sql = (
+        f"DELETE FROM {quote_name(model._meta.db_table)} "
+        f"WHERE {' AND '.join(conditions)} "
+        f"RETURNING {quote_name(model._meta.pk.column)}, {', '.join(columns)}"
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            instances = [
+                _build(model, using, pk, dict(zip(names, row)))
+                for pk, *row in cursor.fetchall()
+            ]
+        for instance in instances:
+            post_delete.send(
+                sender=model,
+                instance=instance,
+                using=using,
+                origin=instance,
+            )
+    return instances
+
+
+def add_relation(model, **values):
+    instances = add_relations(model, [values])
+    return instances[0] if instances else None
+
+
+def remove_relation(model, **values):
+    return len(remove_relations(model, values))
+
+
+def apply_relation_batch(
+    model, owner, target_field, targets, add=(), remove=(), forbidden=()
+):
+    # owner holds the fixed side of the relation, e.g. {"user_id": 1}.
+    existing = set(
+        targets.filter(pk__in=[*add, *remove]).values_list("pk", flat=True)
+    )
+    with transaction.atomic(using=router.db_for_write(model)):
+        added = {
+            getattr(instance, target_field)
+            for instance in add_relations(
+                model,
+                [
+                    {**owner, target_field: target_id}
+                    for target_id in add
+                    if target_id in existing and target_id not in forbidden
+                ],
+            )
+        }
+        removed = {
+            getattr(instance, target_field)
+            for instance in remove_relations(
+                model,
+                owner,
+                target_field,
+                [target_id for target_id in remove if target_id in existing],
+            )
+        }
+    results = []
+    for action, ids, done, not_done in (
+        ("add", add, added, ALREADY_ADDED),
+        ("remove", remove, removed, NOT_ADDED),
+    ):
+        for target_id in ids:
+            if target_id not in existing:
+                result = NOT_FOUND
+            elif action == "add" and target_id in forbidden:
+                result = FORBIDDEN
+            elif target_id in done:
+                result = ADDED if action == "add" else REMOVED
+            else:
+                result = not_done
+            results.append(
+                {"id": target_id, "action": action, "status": result}
+            )
+    return results
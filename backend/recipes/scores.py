@@ -0,0 +1,44 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+# Scores are stored as log(sum(weight * 2 ** (hours since EPOCH / half
+# life))). Every stored score decays at the same rate, so they never
+# have to be rewritten, and the log keeps the numbers small.
+EPOCH = datetime(2022, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def event_score(weight, moment=None):
+    # An event without weight leaves the sum unchanged, and log(0) is
+    # undefined.
+    if weight <= 0:
+        return None
+    moment = moment or timezone.now()
+    half_life = settings.RECIPE_TRENDING["HALF_LIFE_HOURS"] * 3600
+    return math.log(weight) + (
+        math.log(2) * (moment - EPOCH).total_seconds() / half_life
+    )
+
+
+def add_score(field, score):
+    # log(e^a + e^b) = max(a, b) + log(1 + e^-|a - b|)
+    score = Value(score)
+    return Greatest(F(field), score) + Ln(
+        Value(1.0) + Exp(-Abs(F(field) - score))
+    )
+
+
+def initial_score(favorites_count=0, shopping_cart_count=0, moment=None):
+    weights = settings.RECIPE_TRENDING
+    score = event_score(
+        weights["RECIPE_WEIGHT"]
+        + weights["FAVORITE_WEIGHT"] * favorites_count
+        + weights["SHOPPING_CART_WEIGHT"] * shopping_cart_count,
+        moment,
+    )
+    # Recipes still need a row to appear in trending().
+    return 0.0 if score is None else score
@@ -0,0 +1,76 @@
+import bisect
+import threading
+from collections import defaultdict
+
+from . import cache
+from .models import Ingredient
+
+NGRAM_SIZE = 3
+PREFIX_END = "\U0010ffff"
+
+
+def normalize(value):
+    return value.casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._state = ([], [], {})
+
+    def build(self, rows):
+        entries = sorted((normalize(name), pk) for pk, name in rows)
+        names = [name for name, _ in entries]
+        ngrams = defaultdict(set)
+        for position, name in enumerate(names):
+            for start in range(len(name) - NGRAM_SIZE + 1):
+                ngrams[name[start:start + NGRAM_SIZE]].add(position)
+        self._state = (names, [pk for _, pk in entries], dict(ngrams))
+
+    def refresh(self):
+        version = cache.get_version(cache.INGREDIENTS)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self.build(Ingredient.objects.values_list("pk", "name"))
+            self._version = version
+
+    @staticmethod
+    def _contains_positions(query, names, ngrams):
+        if len(query) < NGRAM_SIZE:
+            return [
+                position
+                for position, name in enumerate(names)
+                if query in name
+            ]
+        grams = sorted(
+            (
+                ngrams.get(query[start:start + NGRAM_SIZE], set())
+                for start in range(len(query) - NGRAM_SIZE + 1)
+            ),
+            key=len,
+        )
+        candidates = set.intersection(*grams)
+        return sorted(
+            position for position in candidates if query in names[position]
+        )
+
+    def search(self, value):
+        self.refresh()
+        names, ids, ngrams = self._state
+        query = normalize(value)
+        start = bisect.bisect_left(names, query)
+        end = bisect.bisect_right(names, query + PREFIX_END, lo=start)
+        prefix_ids = ids[start:end]
+        contains_ids = [
+            ids[position]
+            for position in self._contains_positions(query, names, ngrams)
+            if not start <= position < end
+        ]
+        return prefix_ids, contains_ids
+
+
+ingredient_index = IngredientIndex()
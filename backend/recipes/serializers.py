@@ -1,9 +1,15 @@
+from collections import defaultdict
+
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from users.serializers import CustomUserSerializer
+from . import images
+from .fields import RenditionImageField
+from .fieldsets import SparseFieldsetMixin
 from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -17,7 +23,7 @@ class TagSerializer(serializers.ModelSerializer):
         )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = (
@@ -46,7 +52,9 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    sparse_columns = {"image": ("image_renditions",)}
+
     tags = TagSerializer(
         many=True,
         read_only=True,
@@ -58,7 +66,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
-    image = Base64ImageField()
+    image = RenditionImageField(rendition="full", many_rendition="card")
 
     class Meta:
         model = Recipe
@@ -75,7 +83,9 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "cooking_time",
         )
 
-    def _get_is_object_exists(self, model, obj):
+    def _get_is_object_exists(self, model, obj, annotation):
+        if hasattr(obj, annotation):
+            return getattr(obj, annotation)
         user = self.context["request"].user
         return (
             user.is_authenticated
@@ -86,17 +96,36 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
-        return self._get_is_object_exists(Favorite, obj)
+        return self._get_is_object_exists(Favorite, obj, "is_favorited")
 
     def get_is_in_shopping_cart(self, obj):
-        return self._get_is_object_exists(ShoppingCart, obj)
+        return self._get_is_object_exists(
+            ShoppingCart, obj, "is_in_shopping_cart"
+        )
+
+
+class RecipeCardSerializer(RecipeReadSerializer):
+    class Meta(RecipeReadSerializer.Meta):
+        fields = (
+            "id",
+            "tags",
+            "author",
+            "is_favorited",
+            "is_in_shopping_cart",
+            "name",
+            "image",
+            "cooking_time",
+        )
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(
+    image = RenditionImageField(
+        rendition="thumbnail",
         max_length=None,
         use_url=True,
     )
+    # Columns enough to serialize a recipe, for lookups with .only().
+    model_fields = ("id", "name", "image", "image_renditions", "cooking_time")
 
     class Meta:
         model = Recipe
@@ -143,30 +172,113 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             "cooking_time",
         )
 
-    def _add_tags_and_ingredients(self, recipe, tags_data, ingredients_data):
+    def validate_ingredients(self, value):
+        ingredient_ids = [item["ingredient"].pk for item in value]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                "Ингредиенты не должны повторяться"
+            )
+        return value
+
+    def _get_ingredient_pairs(self, ingredients_data):
+        return {
+            (item["ingredient"].pk, item["amount"])
+            for item in ingredients_data
+        }
+
+    def _add_tags_and_ingredients(self, recipe, tags_data, ingredient_pairs):
         recipe.tags.set(tags_data)
-        recipe.ingredients.set(IngredientAmount.objects.bulk_create([
-            IngredientAmount(
-                ingredient=item.get('ingredient'),
-                amount=item.get('amount'),
-            ) for item in ingredients_data
-        ]))
+        recipe.ingredients.set(
+            IngredientAmount.objects.bulk_get_or_create(ingredient_pairs)
+        )
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         tags_data = validated_data.pop("tags")
         ingredients_data = validated_data.pop("ingredients")
         recipe = Recipe.objects.create(**validated_data)
+        images.schedule(recipe)
         return self._add_tags_and_ingredients(
-            recipe, tags_data, ingredients_data
+            recipe, tags_data, self._get_ingredient_pairs(ingredients_data)
         )
 
+    def _get_amounts(self, ingredient_pairs):
+        amounts = defaultdict(int)
+        for ingredient_id, amount in ingredient_pairs:
+            amounts[ingredient_id] += amount
+        return amounts
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
         tags_data = validated_data.pop("tags")
-        ingredients_data = validated_data.pop("ingredients")
+        new_pairs = self._get_ingredient_pairs(
+            validated_data.pop("ingredients")
+        )
+        old_ingredient_amounts = {
+            (ingredient_id, amount): pk
+            for pk, ingredient_id, amount in instance.ingredients.values_list(
+                "pk", "ingredient", "amount"
+            )
+        }
+        old_pairs = old_ingredient_amounts.keys()
+        old_renditions = instance.image_renditions
+        if "image" in validated_data:
+            validated_data["image_renditions"] = {}
         super(RecipeWriteSerializer, self).update(instance, validated_data)
-        return self._add_tags_and_ingredients(
-            instance, tags_data, ingredients_data
+        if "image" in validated_data:
+            transaction.on_commit(
+                lambda: images.delete_renditions(old_renditions)
+            )
+            images.schedule(instance)
+        instance.tags.set(tags_data)
+        removed_ids = [
+            old_ingredient_amounts[pair] for pair in old_pairs - new_pairs
+        ]
+        if removed_ids:
+            instance.ingredients.remove(*removed_ids)
+        added_pairs = new_pairs - old_pairs
+        if added_pairs:
+            instance.ingredients.add(
+                *IngredientAmount.objects.bulk_get_or_create(added_pairs)
+            )
+        ShoppingListItem.objects.update_recipe(
+            instance.pk,
+            self._get_amounts(old_pairs),
+            self._get_amounts(new_pairs),
         )
+        # Rows left without recipes are removed by
+        # purge_orphan_ingredient_amounts: another request may be linking
+        # the same shared row right now.
+        return instance
+
+
+class RelationBatchSerializer(serializers.Serializer):
+    max_size = 500
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=max_size,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=max_size,
+        default=list,
+    )
+
+    def validate(self, data):
+        add, remove = data["add"], data["remove"]
+        if not add and not remove:
+            raise serializers.ValidationError(
+                "Передайте идентификаторы в add или remove"
+            )
+        if len(set(add)) != len(add) or len(set(remove)) != len(remove):
+            raise serializers.ValidationError(
+                "Идентификаторы не должны повторяться"
+            )
+        if set(add) & set(remove):
+            raise serializers.ValidationError(
+                "Нельзя одновременно добавить и удалить один объект"
+            )
+        return data
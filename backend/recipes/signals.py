@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import UserStats
+
+from . import cache, images
+from .counters import change_counters
+from .models import (Favorite, Ingredient, Recipe, RecipeScore,
+                     ShoppingCart, ShoppingListItem, Tag)
+from .pagination import invalidate_counts
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    cache.invalidate(cache.TAGS)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    cache.invalidate(cache.INGREDIENTS)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_recipe_to_shopping_list(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        ShoppingListItem.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_recipe_from_shopping_list(sender, instance, origin, **kwargs):
+    # A deleted recipe has already been removed from the shopping lists,
+    # and its ingredients may be gone by the time its carts are deleted.
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is Recipe:
+        return
+    ShoppingListItem.objects.remove_recipe(
+        instance.user_id, instance.recipe_id
+    )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_deleted_recipe_from_shopping_lists(sender, instance, **kwargs):
+    ShoppingListItem.objects.update_recipe(
+        instance.pk, ShoppingListItem.objects.recipe_amounts(instance.pk), {}
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_renditions(sender, instance, **kwargs):
+    renditions = instance.image_renditions
+    transaction.on_commit(lambda: images.delete_renditions(renditions))
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.change(instance.author_id, recipes_count=1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    UserStats.objects.change(instance.author_id, recipes_count=-1)
+
+
+RECIPE_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "shopping_cart_count",
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_counters(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            **{RECIPE_COUNTERS[sender]: 1},
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    change_counters(
+        Recipe.objects.filter(pk=instance.recipe_id),
+        **{RECIPE_COUNTERS[sender]: -1},
+    )
+
+
+TRENDING_WEIGHTS = {
+    Recipe: "RECIPE_WEIGHT",
+    Favorite: "FAVORITE_WEIGHT",
+    ShoppingCart: "SHOPPING_CART_WEIGHT",
+}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def add_trending_event(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        RecipeScore.objects.add_event(
+            instance.pk if sender is Recipe else instance.recipe_id,
+            settings.RECIPE_TRENDING[TRENDING_WEIGHTS[sender]],
+        )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_page_counts(sender, created=True, **kwargs):
+    # Updates do not change the number of rows.
+    if created:
+        invalidate_counts()
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def invalidate_user_page_counts(sender, instance, created=True, **kwargs):
+    if created:
+        invalidate_counts(instance.user_id)
@@ -0,0 +1,163 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import Subscription, User, UserStats
+
+from ..models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                      ShoppingCart, ShoppingListItem)
+
+FAVORITE_URL = "/api/recipes/favorite/batch/"
+SHOPPING_CART_URL = "/api/recipes/shopping_cart/batch/"
+SUBSCRIBE_URL = "/api/users/subscribe/batch/"
+
+
+class RelationBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.author = User.objects.create_user(username="author")
+        cls.ingredient = Ingredient.objects.create(
+            name="мука", measurement_unit="г"
+        )
+        cls.recipes = []
+        for number in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            recipe.ingredients.set(
+                IngredientAmount.objects.bulk_get_or_create(
+                    [(cls.ingredient.pk, 100)]
+                )
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post(self, url, data, expected_status=status.HTTP_200_OK):
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, expected_status)
+        return response.json()
+
+    def _statuses(self, data):
+        return {
+            (item["id"], item["action"]): item["status"]
+            for item in data["results"]
+        }
+
+    def test_favorite_batch(self):
+        first, second, third, _ = (recipe.id for recipe in self.recipes)
+        Favorite.objects.create(user=self.user, recipe_id=second)
+        Favorite.objects.create(user=self.user, recipe_id=third)
+        with CaptureQueriesContext(connection) as context:
+            data = self._post(
+                FAVORITE_URL,
+                {"add": [first, second, 998], "remove": [third, 999]},
+            )
+        self.assertEqual(
+            self._statuses(data),
+            {
+                (first, "add"): "added",
+                (second, "add"): "already_added",
+                (998, "add"): "not_found",
+                (third, "remove"): "removed",
+                (999, "remove"): "not_found",
+            },
+        )
+        statements = [query["sql"].split()[0] for query in context]
+        self.assertEqual(statements.count("INSERT"), 1)
+        self.assertEqual(statements.count("DELETE"), 1)
+        self.assertEqual(
+            set(
+                Favorite.objects.filter(user=self.user).values_list(
+                    "recipe_id", flat=True
+                )
+            ),
+            {first, second},
+        )
+        self.assertEqual(
+            list(
+                Recipe.objects.filter(
+                    pk__in=(first, third)
+                ).order_by("pk").values_list("favorites_count", flat=True)
+            ),
+            [1, 0],
+        )
+
+    def test_remove_missing_relation(self):
+        data = self._post(FAVORITE_URL, {"remove": [self.recipes[0].id]})
+        self.assertEqual(
+            self._statuses(data),
+            {(self.recipes[0].id, "remove"): "not_added"},
+        )
+
+    def test_shopping_cart_batch(self):
+        ids = [recipe.id for recipe in self.recipes[:3]]
+        self._post(SHOPPING_CART_URL, {"add": ids})
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 300
+        )
+        self._post(SHOPPING_CART_URL, {"remove": ids[:2]})
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 100
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(), 1
+        )
+
+    def test_subscribe_batch(self):
+        other = User.objects.create_user(username="other")
+        data = self._post(
+            SUBSCRIBE_URL,
+            {"add": [self.author.id, other.id, self.user.id]},
+        )
+        self.assertEqual(
+            self._statuses(data),
+            {
+                (self.author.id, "add"): "added",
+                (other.id, "add"): "added",
+                (self.user.id, "add"): "forbidden",
+            },
+        )
+        self.assertEqual(
+            Subscription.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).subscribers_count, 1
+        )
+        data = self._post(SUBSCRIBE_URL, {"remove": [other.id]})
+        self.assertEqual(
+            self._statuses(data), {(other.id, "remove"): "removed"}
+        )
+
+    def test_invalid_payload(self):
+        recipe_id = self.recipes[0].id
+        for data in (
+            {},
+            {"add": [], "remove": []},
+            {"add": [recipe_id, recipe_id]},
+            {"add": [recipe_id], "remove": [recipe_id]},
+            {"add": ["abc"]},
+            {"add": list(range(1, 502))},
+        ):
+            with self.subTest(data=data):
+                self._post(
+                    FAVORITE_URL, data, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_anonymous(self):
+        client = APIClient()
+        for url in (FAVORITE_URL, SHOPPING_CART_URL, SUBSCRIBE_URL):
+            with self.subTest(url=url):
+                response = client.post(url, {"add": [1]}, format="json")
+                self.assertEqual(
+                    response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
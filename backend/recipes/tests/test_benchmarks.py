@@ -0,0 +1,192 @@
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..cache import get_cache
+from ..models import Recipe
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+BUDGETS_PATH = os.path.join(
+    os.path.dirname(__file__), "benchmark_budgets.json"
+)
+# Query budgets are always checked. Latency and memory budgets depend on
+# the machine, so they are enforced only when BENCHMARK=1 is set.
+ENFORCE_TIMINGS = bool(os.getenv("BENCHMARK"))
+SCALE = int(os.getenv("BENCHMARK_SCALE", 1))
+ITERATIONS = int(
+    os.getenv("BENCHMARK_ITERATIONS", 20 if ENFORCE_TIMINGS else 1)
+)
+
+RECIPE_FILTERS = {
+    "recipe_list": "",
+    "recipe_list_tag": "?tags=breakfast",
+    "recipe_list_tags": "?tags=breakfast&tags=lunch",
+    "recipe_list_author": "?author={author}",
+    "recipe_list_favorited": "?is_favorited=1",
+    "recipe_list_in_shopping_cart": "?is_in_shopping_cart=1",
+    "recipe_list_name": "?name=суп",
+    "recipe_list_combined": "?tags={tag}&is_favorited=1&name={name}",
+    "recipe_list_page": "?page=3&limit=6",
+    "recipe_list_cursor": "?pagination=cursor",
+    "recipe_list_popular": "?ordering=popular",
+    "recipe_list_trending": "?ordering=trending",
+    "recipe_list_card": "?view=card",
+}
+
+
+def consume(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ApiBenchmarkTest(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_load_data",
+            users=20 * SCALE,
+            recipes=200 * SCALE,
+            favorites_per_user=10,
+            subscriptions_per_user=5,
+            cart_per_user=5,
+            seed=0,
+            stdout=io.StringIO(),
+        )
+        cls.user = User.objects.get(username="load_0_0")
+        cls.author = User.objects.get(username="load_0_1")
+        # Combined filter parameters come from a seeded favorite, so the
+        # benchmark measures a page with results.
+        favorite = Recipe.objects.filter(favorites__user=cls.user).first()
+        cls.filter_params = {
+            "author": cls.author.pk,
+            "tag": favorite.tags.first().slug,
+            "name": favorite.name.split()[-1],
+        }
+        with open(BUDGETS_PATH, encoding="utf-8") as file:
+            cls.budgets = json.load(file)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        report_path = os.getenv("BENCHMARK_REPORT")
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as file:
+                json.dump(cls.results, file, ensure_ascii=False, indent=2)
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _request(self, url):
+        response = self.client.get(url)
+        consume(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        if not response.streaming:
+            data = response.json()
+            if isinstance(data, dict):
+                data = data.get("results", data)
+            self.assertTrue(data, f"{url}: пустой ответ")
+        return response
+
+    def measure(self, name, urls):
+        urls = list(urls)
+        self._request(urls[0])
+        with CaptureQueriesContext(connection) as context:
+            self._request(urls[1 % len(urls)])
+        queries = len(context)
+        timings = []
+        for iteration in range(ITERATIONS):
+            started = time.perf_counter()
+            self._request(urls[(iteration + 2) % len(urls)])
+            timings.append((time.perf_counter() - started) * 1000)
+        tracemalloc.start()
+        try:
+            self._request(urls[-1])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result = {
+            "queries": queries,
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(
+                sorted(timings)[int(0.95 * (len(timings) - 1))], 2
+            ),
+            "memory_kb": round(peak / 1024),
+        }
+        self.results[name] = result
+        self.check_budget(name, result)
+        return result
+
+    def check_budget(self, name, result):
+        budget = self.budgets[name]
+        self.assertLessEqual(
+            result["queries"],
+            budget["queries"],
+            f"{name}: {result}",
+        )
+        if ENFORCE_TIMINGS:
+            for metric in ("p95_ms", "memory_kb"):
+                self.assertLessEqual(
+                    result[metric], budget[metric], f"{name}: {result}"
+                )
+
+    def test_recipe_list(self):
+        for name, query in RECIPE_FILTERS.items():
+            query = query.format(**self.filter_params)
+            with self.subTest(query=query):
+                self.measure(name, [f"/api/recipes/{query}"])
+
+    def test_recipe_list_anonymous(self):
+        self.client.force_authenticate(None)
+        self.measure("recipe_list_anonymous", ["/api/recipes/"])
+
+    def test_recipe_detail(self):
+        recipe_id = self.user.recipes.values_list("pk", flat=True)[0]
+        self.measure("recipe_detail", [f"/api/recipes/{recipe_id}/"])
+
+    def test_ingredient_search(self):
+        self.measure(
+            "ingredient_search",
+            (
+                f"/api/ingredients/?name=ингредиент {number}"
+                for number in range(ITERATIONS + 3)
+            ),
+        )
+
+    def test_subscriptions(self):
+        self.measure(
+            "subscriptions",
+            ["/api/users/subscriptions/?recipes_limit=3"],
+        )
+
+    def test_download_shopping_cart(self):
+        for format in ("txt", "csv", "json"):
+            with self.subTest(format=format):
+                self.measure(
+                    f"download_shopping_cart_{format}",
+                    [
+                        "/api/recipes/download_shopping_cart/"
+                        f"?format={format}"
+                    ],
+                )
@@ -0,0 +1,115 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..cache import get_cache
+from ..models import Ingredient, Tag
+
+
+class ReferenceDataCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        cls.tag = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name="test апельсин",
+            measurement_unit="шт.",
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_tags_list_is_cached(self):
+        url = "/api/tags/"
+        with self.assertNumQueries(1):
+            self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()[0]["slug"], "breakfast")
+
+    def test_tag_save_invalidates_cache(self):
+        url = "/api/tags/"
+        self.guest_client.get(url)
+        self.tag.name = "test Обед"
+        self.tag.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.json()[0]["name"], "test Обед")
+
+    def test_tag_save_invalidates_cache_on_commit(self):
+        url = "/api/tags/"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = "test Обед"
+            self.tag.save()
+            # A concurrent request still sees the uncommitted old row.
+            Tag.objects.filter(pk=self.tag.pk).update(name="test Завтрак")
+            self.guest_client.get(url)
+            Tag.objects.filter(pk=self.tag.pk).update(name="test Обед")
+        response = self.guest_client.get(url)
+        self.assertEqual(response.json()[0]["name"], "test Обед")
+
+    def test_ingredient_delete_invalidates_cache(self):
+        url = f"/api/ingredients/{self.ingredient.id}/"
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.ingredient.delete()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ingredient_search_is_cached_per_query(self):
+        response = self.guest_client.get("/api/ingredients/?name=test")
+        self.assertEqual(len(response.json()), 1)
+        response = self.guest_client.get("/api/ingredients/?name=xyz")
+        self.assertEqual(response.json(), [])
+        with self.assertNumQueries(0):
+            response = self.guest_client.get("/api/ingredients/?name=test")
+        self.assertEqual(len(response.json()), 1)
+
+    def test_etag_not_modified(self):
+        url = "/api/ingredients/"
+        response = self.guest_client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        Ingredient.objects.create(name="test варенье", measurement_unit="г")
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_last_modified_not_modified(self):
+        url = "/api/tags/"
+        response = self.guest_client.get(url)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_import_ingredients_invalidates_cache(self):
+        etag = self.guest_client.get("/api/ingredients/")["ETag"]
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "data"))
+            path = os.path.join(directory, "data", "ingredients.csv")
+            with open(path, "w", encoding="utf-8") as csvfile:
+                csvfile.write("name,measurement_unit\nтест мука,г\n")
+            current_directory = os.getcwd()
+            os.chdir(directory)
+            try:
+                call_command("import_ingredients", stdout=io.StringIO())
+            finally:
+                os.chdir(current_directory)
+        response = self.guest_client.get("/api/ingredients/")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 2)
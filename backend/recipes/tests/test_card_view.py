@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import Ingredient, IngredientAmount, Recipe, Tag
+
+URL = "/api/recipes/"
+CARD_FIELDS = {
+    "id",
+    "tags",
+    "author",
+    "is_favorited",
+    "is_in_shopping_cart",
+    "name",
+    "image",
+    "cooking_time",
+}
+
+
+class RecipeCardViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.author = User.objects.create_user(username="author")
+        cls.tag = Tag.objects.create(
+            name="Завтрак", color="#6AA84F", slug="breakfast"
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ингредиент {number}", measurement_unit="г")
+            for number in range(15)
+        )
+        amounts = IngredientAmount.objects.bulk_get_or_create(
+            (ingredient.pk, 100) for ingredient in ingredients
+        )
+        for number in range(6):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f"рецепт {number}",
+                image=None,
+                text="Подробное описание приготовления. " * 60,
+                cooking_time=5,
+            )
+            recipe.tags.add(cls.tag)
+            recipe.ingredients.set(amounts)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_card_fields(self):
+        response = self.client.get(f"{URL}?view=card")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for recipe in response.json()["results"]:
+            self.assertEqual(set(recipe), CARD_FIELDS)
+
+    def test_card_skips_heavy_columns_and_ingredients(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f"{URL}?view=card")
+        queries = [query["sql"] for query in context]
+        self.assertFalse(
+            any("recipes_ingredientamount" in query for query in queries)
+        )
+        recipe_query = next(
+            query
+            for query in queries
+            if query.startswith('SELECT "recipes_recipe"."id"')
+        )
+        self.assertNotIn('"recipes_recipe"."text"', recipe_query)
+
+    def test_card_payload_is_much_smaller(self):
+        full = self.client.get(URL).content
+        card = self.client.get(f"{URL}?view=card").content
+        self.assertLess(len(card) * 10, len(full))
+
+    def test_card_detail(self):
+        recipe = Recipe.objects.first()
+        response = self.client.get(f"{URL}{recipe.id}/?view=card")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.json()), CARD_FIELDS)
+
+    def test_invalid_view(self):
+        response = self.client.get(f"{URL}?view=compact")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("view", response.json())
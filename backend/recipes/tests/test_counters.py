@@ -0,0 +1,167 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import Subscription, User, UserStats
+
+from ..models import Favorite, Recipe, ShoppingCart
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.user = User.objects.create_user(username="user")
+        cls.recipe = cls._create_recipe()
+
+    @classmethod
+    def _create_recipe(cls):
+        return Recipe.objects.create(
+            author=cls.author,
+            name="рецепт",
+            image=None,
+            text="описание",
+            cooking_time=5,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _recipe_counters(self):
+        self.recipe.refresh_from_db()
+        return self.recipe.favorites_count, self.recipe.shopping_cart_count
+
+    def _user_counters(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.recipes_count, stats.subscribers_count
+
+    def test_favorite_and_shopping_cart(self):
+        for action, expected in (
+            ("favorite", (1, 0)),
+            ("shopping_cart", (1, 1)),
+        ):
+            response = self.client.post(
+                f"/api/recipes/{self.recipe.id}/{action}/"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self._recipe_counters(), expected)
+        response = self.client.post(f"/api/recipes/{self.recipe.id}/favorite/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._recipe_counters(), (1, 1))
+        for action in ("favorite", "shopping_cart"):
+            response = self.client.delete(
+                f"/api/recipes/{self.recipe.id}/{action}/"
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_204_NO_CONTENT
+            )
+        self.assertEqual(self._recipe_counters(), (0, 0))
+
+    def test_subscribe(self):
+        url = f"/api/users/{self.author.id}/subscribe/"
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["recipes_count"], 1)
+        self.assertEqual(self._user_counters(self.author), (1, 1))
+        self.client.delete(url)
+        self.assertEqual(self._user_counters(self.author), (1, 0))
+
+    def test_recipe_create_and_delete(self):
+        recipe = self._create_recipe()
+        self.assertEqual(self._user_counters(self.author), (2, 0))
+        recipe.delete()
+        self.assertEqual(self._user_counters(self.author), (1, 0))
+
+    def test_counters_do_not_go_negative(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        Favorite.objects.all().delete()
+        self.assertEqual(self._recipe_counters(), (0, 0))
+
+    def test_delete_user(self):
+        Subscription.objects.create(user=self.user, author=self.author)
+        Subscription.objects.create(user=self.author, author=self.user)
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        self.author.delete()
+        self.assertFalse(UserStats.objects.filter(user=self.author).exists())
+        self.assertEqual(self._user_counters(self.user), (0, 0))
+
+
+class ReconcileCountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f"user_{number}")
+            for number in range(3)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.users[number % 2],
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            for number in range(5)
+        ]
+        for user in cls.users:
+            Favorite.objects.create(user=user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.users[0], recipe=cls.recipes[1])
+        Subscription.objects.create(user=cls.users[2], author=cls.users[0])
+
+    def _reconcile(self, **options):
+        stdout = io.StringIO()
+        call_command("reconcile_counters", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def _counters(self):
+        return (
+            list(
+                Recipe.objects.order_by("pk").values_list(
+                    "favorites_count", "shopping_cart_count"
+                )
+            ),
+            list(
+                User.objects.order_by("pk").values_list(
+                    "stats__recipes_count", "stats__subscribers_count"
+                )
+            ),
+        )
+
+    def test_repairs_drift(self):
+        Recipe.objects.update(favorites_count=7, shopping_cart_count=0)
+        UserStats.objects.filter(user=self.users[1]).delete()
+        UserStats.objects.filter(user=self.users[0]).update(recipes_count=0)
+
+        output = self._reconcile(dry_run=True)
+        self.assertIn(
+            "Будет исправлено рецептов: 5, пользователей: 1, "
+            "недостающих записей статистики: 2",
+            output,
+        )
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipes[0].pk).favorites_count, 7
+        )
+
+        output = self._reconcile(batch_size=2)
+        self.assertIn(
+            "Исправлено рецептов: 5, пользователей: 2, "
+            "недостающих записей статистики: 2",
+            output,
+        )
+        self.assertEqual(
+            self._counters(),
+            (
+                [(3, 0), (0, 1), (0, 0), (0, 0), (0, 0)],
+                [(3, 1), (2, 0), (0, 0)],
+            ),
+        )
+
+    def test_nothing_to_repair(self):
+        output = self._reconcile()
+        self.assertIn("Исправлено рецептов: 0, пользователей: 0", output)
+        self.assertEqual(UserStats.objects.count(), len(self.users))
@@ -0,0 +1,124 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from .. import cache
+from ..models import Ingredient, IngredientAmount, Recipe, Tag
+
+URL = "/api/recipes/"
+INGREDIENTS_URL = "/api/ingredients/"
+
+
+def recipe_select(queries):
+    return next(
+        query
+        for query in queries
+        if query.startswith('SELECT "recipes_recipe"."id"')
+    )
+
+
+class RecipeFieldsetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.author = User.objects.create_user(username="author")
+        cls.tag = Tag.objects.create(
+            name="Завтрак", color="#6AA84F", slug="breakfast"
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name="мука", measurement_unit="г"
+        )
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            recipe.tags.add(cls.tag)
+            recipe.ingredients.set(
+                IngredientAmount.objects.bulk_get_or_create(
+                    [(cls.ingredient.pk, 100)]
+                )
+            )
+        cls.recipe = recipe
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), [query["sql"] for query in context]
+
+    def test_fields(self):
+        data, queries = self._get(f"{URL}?fields=id,name,cooking_time")
+        for recipe in data["results"]:
+            self.assertEqual(set(recipe), {"id", "name", "cooking_time"})
+        self.assertEqual(len(queries), 2)
+        select = recipe_select(queries)
+        for column in ("text", "author_id", "image"):
+            self.assertNotIn(f'"recipes_recipe"."{column}"', select)
+        self.assertNotIn("recipes_favorite", select)
+        self.assertNotIn("recipes_shoppingcart", select)
+
+    def test_omit(self):
+        data, queries = self._get(
+            f"{URL}?omit=ingredients,author,is_in_shopping_cart"
+        )
+        for recipe in data["results"]:
+            self.assertFalse(
+                {"ingredients", "author", "is_in_shopping_cart"} & set(recipe)
+            )
+            self.assertIn("is_favorited", recipe)
+        self.assertFalse(
+            any("recipes_ingredientamount" in query for query in queries)
+        )
+        self.assertFalse(
+            any('FROM "users_user"' in query for query in queries)
+        )
+        select = recipe_select(queries)
+        self.assertIn("recipes_favorite", select)
+        self.assertNotIn("recipes_shoppingcart", select)
+
+    def test_detail(self):
+        data, _ = self._get(f"{URL}{self.recipe.id}/?fields=id,author")
+        self.assertEqual(set(data), {"id", "author"})
+        self.assertIn("is_subscribed", data["author"])
+
+    def test_image_loads_renditions(self):
+        _, queries = self._get(f"{URL}?fields=image")
+        self.assertIn(
+            '"recipes_recipe"."image_renditions"', recipe_select(queries)
+        )
+
+    def test_fields_with_card_view(self):
+        data, _ = self._get(f"{URL}?view=card&omit=tags")
+        self.assertNotIn("tags", data["results"][0])
+
+    def test_unknown_fields(self):
+        for query in (
+            "fields=id,secret",
+            "omit=password",
+            "view=card&fields=text",
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f"{URL}?{query}")
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_ingredients(self):
+        cache.invalidate(cache.INGREDIENTS)
+        data, queries = self._get(f"{INGREDIENTS_URL}?fields=name")
+        self.assertEqual(data, [{"name": "мука"}])
+        self.assertNotIn("measurement_unit", queries[0])
+        response = self.client.get(f"{INGREDIENTS_URL}?omit=unknown")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,149 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import Ingredient, Recipe, Tag
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_base64_image(size=(2000, 1000)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "orange").save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_RENDITION_WORKERS=0)
+class ImageRenditionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.author_client = APIClient()
+        cls.author_client.force_authenticate(cls.author)
+        cls.tag = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.orange = Ingredient.objects.create(
+            name="апельсин",
+            measurement_unit="шт.",
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def _recipe_data(self):
+        return {
+            "ingredients": [{"id": self.orange.id, "amount": 1}],
+            "tags": [self.tag.id],
+            "image": make_base64_image(),
+            "name": "тестовый рецепт",
+            "text": "описание",
+            "cooking_time": 4,
+        }
+
+    def _create_recipe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.post(
+                "/api/recipes/", self._recipe_data(), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Recipe.objects.latest("id")
+
+    def test_create_recipe_generates_renditions(self):
+        recipe = self._create_recipe()
+        self.assertEqual(
+            set(recipe.image_renditions), set(settings.IMAGE_RENDITIONS)
+        )
+        for rendition, size in settings.IMAGE_RENDITIONS.items():
+            for name in recipe.image_renditions[rendition].values():
+                with default_storage.open(name) as file:
+                    image = Image.open(file)
+                    self.assertLessEqual(image.width, size[0])
+                    self.assertLessEqual(image.height, size[1])
+        self.assertEqual(
+            Image.open(
+                default_storage.path(
+                    recipe.image_renditions["card"]["jpeg"]
+                )
+            ).format,
+            "JPEG",
+        )
+
+    def test_serializers_return_matching_rendition(self):
+        recipe = self._create_recipe()
+        response = self.author_client.get("/api/recipes/")
+        self.assertTrue(
+            response.json()["results"][0]["image"].endswith(
+                recipe.image_renditions["card"]["webp"]
+            )
+        )
+        response = self.author_client.get(f"/api/recipes/{recipe.id}/")
+        self.assertTrue(
+            response.json()["image"].endswith(
+                recipe.image_renditions["full"]["webp"]
+            )
+        )
+        response = self.author_client.post(
+            f"/api/recipes/{recipe.id}/favorite/"
+        )
+        self.assertTrue(
+            response.json()["image"].endswith(
+                recipe.image_renditions["thumbnail"]["webp"]
+            )
+        )
+
+    def test_pending_rendition_falls_back_to_original(self):
+        with self.captureOnCommitCallbacks():
+            response = self.author_client.post(
+                "/api/recipes/", self._recipe_data(), format="json"
+            )
+        recipe = Recipe.objects.latest("id")
+        self.assertEqual(recipe.image_renditions, {})
+        response = self.author_client.get(f"/api/recipes/{recipe.id}/")
+        self.assertEqual(
+            response.json()["image"],
+            f"http://testserver{recipe.image.url}",
+        )
+
+    def test_image_update_replaces_renditions(self):
+        recipe = self._create_recipe()
+        old_name = recipe.image_renditions["full"]["webp"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.patch(
+                f"/api/recipes/{recipe.id}/",
+                self._recipe_data(),
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertNotEqual(recipe.image_renditions["full"]["webp"], old_name)
+        self.assertFalse(default_storage.exists(old_name))
+
+    def test_process_image_renditions(self):
+        with self.captureOnCommitCallbacks():
+            response = self.author_client.post(
+                "/api/recipes/", self._recipe_data(), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        call_command("process_image_renditions", stdout=io.StringIO())
+        recipe = Recipe.objects.latest("id")
+        self.assertEqual(
+            set(recipe.image_renditions), set(settings.IMAGE_RENDITIONS)
+        )
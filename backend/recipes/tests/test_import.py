@@ -0,0 +1,84 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..importers import import_ingredients, read_ingredients
+from ..models import Ingredient
+
+CSV_DATA = (
+    "name,measurement_unit\n"
+    "мука,г\n"
+    "сахар,г\n"
+    "мука,г\n"
+    "мука,стакан\n"
+    "соль\n"
+)
+
+
+class ImportIngredientsTest(TestCase):
+    def setUp(self):
+        Ingredient.objects.create(name="сахар", measurement_unit="г")
+
+    def test_import_ingredients_deduplicates_rows(self):
+        result = import_ingredients(
+            read_ingredients(io.StringIO(CSV_DATA)), batch_size=2
+        )
+        self.assertEqual(result.read, 4)
+        self.assertEqual(result.new, 2)
+        self.assertEqual(result.inserted, 2)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(
+            set(Ingredient.objects.values_list("name", "measurement_unit")),
+            {("мука", "г"), ("мука", "стакан"), ("сахар", "г")},
+        )
+
+    def test_import_ingredients_is_idempotent(self):
+        import_ingredients(read_ingredients(io.StringIO(CSV_DATA)))
+        result = import_ingredients(read_ingredients(io.StringIO(CSV_DATA)))
+        self.assertEqual(result.inserted, 0)
+        self.assertEqual(Ingredient.objects.count(), 3)
+
+    def test_import_ingredients_batch_queries(self):
+        rows = [(f"ингредиент {number}", "г") for number in range(10)]
+        # Per batch: savepoint, existing check, two counts, insert, release.
+        with self.assertNumQueries(12):
+            import_ingredients(rows, batch_size=5)
+
+    def test_import_ingredients_counts_created_rows(self):
+        calls = []
+        real_filter = Ingredient.objects.filter
+
+        def concurrent_filter(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                # Another import adds a row right after the existing check.
+                Ingredient.objects.create(name="соль", measurement_unit="г")
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(
+            Ingredient.objects, "filter", concurrent_filter
+        ):
+            result = import_ingredients([("мука", "г"), ("соль", "г")])
+        self.assertEqual(result.new, 2)
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(Ingredient.objects.count(), 3)
+
+    def test_import_ingredients_command_dry_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ingredients.csv")
+            with open(path, "w", encoding="utf-8") as csvfile:
+                csvfile.write(CSV_DATA)
+            stdout = io.StringIO()
+            call_command(
+                "import_ingredients", path, dry_run=True, stdout=stdout
+            )
+            self.assertEqual(Ingredient.objects.count(), 1)
+            self.assertIn("новых: 2, добавлено: 0", stdout.getvalue())
+            call_command(
+                "import_ingredients", path, batch_size=1, stdout=io.StringIO()
+            )
+        self.assertEqual(Ingredient.objects.count(), 3)
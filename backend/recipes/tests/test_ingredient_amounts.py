@@ -0,0 +1,223 @@
+import io
+import re
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import (Ingredient, IngredientAmount, IngredientAmountQuerySet,
+                      Recipe, Tag)
+
+
+class IngredientAmountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.author_client = APIClient()
+        cls.author_client.force_authenticate(cls.author)
+        cls.tag = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.orange = Ingredient.objects.create(
+            name="апельсин",
+            measurement_unit="шт.",
+        )
+        cls.jam = Ingredient.objects.create(
+            name="варенье",
+            measurement_unit="ложка",
+        )
+
+    def _create_recipe(self, ingredients):
+        recipe = Recipe.objects.create(
+            author=self.author,
+            name="тестовый рецепт",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        recipe.ingredients.set(
+            IngredientAmount.objects.bulk_get_or_create(ingredients)
+        )
+        return recipe
+
+    def _update_recipe(self, recipe, ingredients):
+        data = {
+            "ingredients": [
+                {"id": ingredient.id, "amount": amount}
+                for ingredient, amount in ingredients
+            ],
+            "tags": [self.tag.id],
+            "name": "тестовый рецепт",
+            "text": "описание",
+            "cooking_time": 4,
+        }
+        return self.author_client.patch(
+            f"/api/recipes/{recipe.id}/", data, format="json"
+        )
+
+    def test_ingredient_amount_is_unique(self):
+        IngredientAmount.objects.create(ingredient=self.orange, amount=5)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            IngredientAmount.objects.create(ingredient=self.orange, amount=5)
+
+    def test_bulk_get_or_create_reuses_rows(self):
+        existing = IngredientAmount.objects.create(
+            ingredient=self.orange, amount=5
+        )
+        amounts = IngredientAmount.objects.bulk_get_or_create(
+            [(self.orange.id, 5), (self.jam.id, 1)]
+        )
+        self.assertEqual(len(amounts), 2)
+        self.assertIn(existing, amounts)
+        self.assertEqual(IngredientAmount.objects.count(), 2)
+
+    def test_bulk_get_or_create_restores_purged_rows(self):
+        bulk_create = IngredientAmountQuerySet.bulk_create
+        calls = []
+
+        def purged_bulk_create(queryset, objs, **kwargs):
+            calls.append(kwargs)
+            try:
+                return bulk_create(queryset, objs, **kwargs)
+            finally:
+                if len(calls) == 1:
+                    # The purge command deletes a row before it is read.
+                    IngredientAmount.objects.filter(
+                        ingredient=self.jam
+                    ).delete()
+
+        with mock.patch.object(
+            IngredientAmountQuerySet, "bulk_create", purged_bulk_create
+        ):
+            amounts = IngredientAmount.objects.bulk_get_or_create(
+                [(self.orange.id, 5), (self.jam.id, 1)]
+            )
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            {(amount.ingredient_id, amount.amount) for amount in amounts},
+            {(self.orange.id, 5), (self.jam.id, 1)},
+        )
+        self.assertEqual(IngredientAmount.objects.count(), 2)
+
+    def test_recipes_share_ingredient_amounts(self):
+        first = self._create_recipe([(self.orange.id, 5)])
+        second = self._create_recipe([(self.orange.id, 5)])
+        self.assertEqual(
+            first.ingredients.get(), second.ingredients.get()
+        )
+        self.assertEqual(IngredientAmount.objects.count(), 1)
+
+    def test_recipe_update_leaves_orphans_to_purge(self):
+        recipe = self._create_recipe([(self.orange.id, 5), (self.jam.id, 1)])
+        shared = self._create_recipe([(self.jam.id, 1)])
+        response = self._update_recipe(recipe, [(self.orange, 3)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(recipe.ingredients.values_list("ingredient", "amount")),
+            {(self.orange.id, 3)},
+        )
+        self.assertEqual(shared.ingredients.get().amount, 1)
+        self.assertEqual(
+            list(
+                IngredientAmount.objects.orphans().values_list(
+                    "ingredient__name", "amount"
+                )
+            ),
+            [("апельсин", 5)],
+        )
+
+    def test_recipe_duplicate_ingredients(self):
+        recipe = self._create_recipe([(self.orange.id, 5)])
+        response = self._update_recipe(
+            recipe, [(self.orange, 3), (self.orange, 2)]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ingredients", response.json())
+
+    def test_recipe_update_without_changes_keeps_rows(self):
+        recipe = self._create_recipe([(self.orange.id, 5)])
+        amount = recipe.ingredients.get()
+        response = self._update_recipe(recipe, [(self.orange, 5)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe.ingredients.get(), amount)
+
+    def test_recipe_update_writes_only_changes(self):
+        recipe = self._create_recipe([(self.orange.id, 5), (self.jam.id, 1)])
+        recipe.tags.add(self.tag)
+        kept = recipe.ingredients.get(ingredient=self.orange)
+        with CaptureQueriesContext(connection) as context:
+            response = self._update_recipe(
+                recipe, [(self.orange, 5), (self.jam, 2)]
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tables = [
+            re.search(r'(?:INTO|FROM) "(\w+)"', query["sql"]).group(1)
+            for query in context.captured_queries
+            if query["sql"].startswith(("INSERT", "DELETE"))
+        ]
+        self.assertNotIn("recipes_recipe_tags", tables)
+        self.assertEqual(tables.count("recipes_recipe_ingredients"), 2)
+        self.assertIn(kept, recipe.ingredients.all())
+        self.assertEqual(
+            set(recipe.ingredients.values_list("ingredient", "amount")),
+            {(self.orange.id, 5), (self.jam.id, 2)},
+        )
+
+    def test_recipe_delete_leaves_orphans_to_purge(self):
+        recipe = self._create_recipe([(self.orange.id, 5), (self.jam.id, 1)])
+        self._create_recipe([(self.jam.id, 1)])
+        recipe.delete()
+        self.assertEqual(IngredientAmount.objects.count(), 2)
+        call_command("purge_orphan_ingredient_amounts", stdout=io.StringIO())
+        self.assertEqual(
+            list(IngredientAmount.objects.values_list("amount", flat=True)),
+            [1],
+        )
+
+    def test_purge_orphan_ingredient_amounts(self):
+        self._create_recipe([(self.orange.id, 5)])
+        IngredientAmount.objects.create(ingredient=self.orange, amount=1)
+        IngredientAmount.objects.create(ingredient=self.jam, amount=1)
+        call_command(
+            "purge_orphan_ingredient_amounts",
+            dry_run=True,
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(IngredientAmount.objects.count(), 3)
+        call_command(
+            "purge_orphan_ingredient_amounts",
+            batch_size=1,
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(
+            list(IngredientAmount.objects.values_list("amount", flat=True)),
+            [5],
+        )
+
+    def test_purge_skips_batch_linked_meanwhile(self):
+        IngredientAmount.objects.create(ingredient=self.jam, amount=1)
+        delete = IngredientAmountQuerySet.delete
+        calls = []
+
+        def linked_delete(queryset):
+            calls.append(queryset)
+            if len(calls) == 1:
+                raise IntegrityError
+            return delete(queryset)
+
+        with mock.patch.object(
+            IngredientAmountQuerySet, "delete", linked_delete
+        ):
+            call_command(
+                "purge_orphan_ingredient_amounts", stdout=io.StringIO()
+            )
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(IngredientAmount.objects.exists())
@@ -6,6 +6,7 @@ from rest_framework.test import APIClient
 
 from users.models import User
 
+from ..cache import get_cache
 from ..models import Ingredient
 
 
@@ -25,6 +26,9 @@ class IngredientTest(TestCase):
             measurement_unit="ложка",
         )
 
+    def setUp(self):
+        get_cache().clear()
+
     def test_cool_test(self):
         self.assertEqual(True, True)
 
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from users.models import Subscription, User
+
+from ..models import Favorite, Ingredient, Recipe, ShoppingCart
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateLoadDataTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def _generate(self, **options):
+        options = {
+            "users": 10,
+            "recipes": 25,
+            "favorites_per_user": 3,
+            "subscriptions_per_user": 2,
+            "cart_per_user": 2,
+            "ingredients_per_recipe": 4,
+            "seed": 1,
+            "batch_size": 7,
+            **options,
+        }
+        call_command("generate_load_data", stdout=io.StringIO(), **options)
+
+    def test_generate_load_data(self):
+        self._generate()
+        self.assertEqual(
+            User.objects.filter(username__startswith="load_1_").count(), 10
+        )
+        self.assertEqual(Recipe.objects.count(), 25)
+        self.assertEqual(Ingredient.objects.count(), 1000)
+        self.assertEqual(Favorite.objects.count(), 30)
+        self.assertEqual(Subscription.objects.count(), 20)
+        self.assertEqual(ShoppingCart.objects.count(), 20)
+        self.assertEqual(
+            Recipe.objects.values("image").distinct().count(), 1
+        )
+        self.assertTrue(
+            Recipe.objects.first().image.path.startswith(TEMP_MEDIA_ROOT)
+        )
+        for recipe in Recipe.objects.prefetch_related("ingredients", "tags"):
+            self.assertEqual(len(recipe.ingredients.all()), 4)
+            self.assertTrue(recipe.tags.all())
+        call_command(
+            "rebuild_shopping_lists", verify=True, stdout=io.StringIO()
+        )
+
+    def test_generate_load_data_is_reproducible(self):
+        self._generate()
+        first = list(Recipe.objects.order_by("pk").values_list(
+            "name", "cooking_time", "author__username"
+        ))
+        Recipe.objects.all().delete()
+        User.objects.all().delete()
+        self._generate()
+        second = list(Recipe.objects.order_by("pk").values_list(
+            "name", "cooking_time", "author__username"
+        ))
+        self.assertEqual(first, second)
+
+    def test_generate_load_data_twice_with_same_seed(self):
+        self._generate()
+        with self.assertRaises(CommandError):
+            self._generate()
+        self._generate(seed=2)
+        self.assertEqual(Recipe.objects.count(), 50)
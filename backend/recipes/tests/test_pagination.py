@@ -0,0 +1,231 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import Recipe, Tag
+from ..pagination import RecipeCursorPagination, estimate_count
+
+
+class RecipeCursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        cls.author = User.objects.create_user(username="author")
+        cls.breakfast = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.dinner = Tag.objects.create(
+            name="test Ужин",
+            color="#9922C8",
+            slug="dinner",
+        )
+        cls.recipes = []
+        for number in range(10):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            recipe.tags.add(cls.breakfast if number % 2 else cls.dinner)
+            cls.recipes.append(recipe)
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.guest_client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            ids.extend(recipe["id"] for recipe in data["results"])
+            url = data["next"]
+        return ids, data
+
+    def test_cursor_pages_cover_feed(self):
+        ids, data = self._walk("/api/recipes/?pagination=cursor&limit=3")
+        self.assertEqual(
+            ids, [recipe.id for recipe in reversed(self.recipes)]
+        )
+        self.assertNotIn("count", data)
+        self.assertIsNotNone(data["previous"])
+
+    def test_cursor_keeps_filters(self):
+        ids, _ = self._walk(
+            "/api/recipes/?pagination=cursor&limit=2&tags=breakfast"
+        )
+        self.assertEqual(
+            ids,
+            [
+                recipe.id
+                for recipe in reversed(self.recipes)
+                if recipe.tags.get() == self.breakfast
+            ],
+        )
+
+    def test_cursor_previous_link(self):
+        response = self.guest_client.get(
+            "/api/recipes/?pagination=cursor&limit=4"
+        )
+        second_page = self.guest_client.get(response.json()["next"]).json()
+        first_page = self.guest_client.get(second_page["previous"]).json()
+        self.assertEqual(first_page, response.json())
+
+    def test_cursor_pagination_skips_count(self):
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get("/api/recipes/?pagination=cursor")
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context)
+        )
+
+    def test_cursor_pagination_count(self):
+        url = "/api/recipes/?pagination=cursor&tags=breakfast"
+        response = self.guest_client.get(url + "&count=exact")
+        self.assertEqual(response.json()["count"], 5)
+        self.assertFalse(response.json()["count_capped"])
+        response = self.guest_client.get(url + "&count=approximate")
+        self.assertEqual(response.json()["count"], 5)
+        self.assertFalse(response.json()["count_capped"])
+        with mock.patch.object(
+            RecipeCursorPagination, "approximate_count_limit", 3
+        ):
+            response = self.guest_client.get(url + "&count=approximate")
+        self.assertEqual(response.json()["count"], 3)
+        self.assertTrue(response.json()["count_capped"])
+
+    def test_invalid_cursor(self):
+        response = self.guest_client.get("/api/recipes/?cursor=invalid")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_by_default(self):
+        response = self.guest_client.get("/api/recipes/?page=2&limit=4")
+        data = response.json()
+        self.assertEqual(data["count"], 10)
+        self.assertEqual(len(data["results"]), 4)
+
+
+class PaginationCountModeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        cls.author = User.objects.create_user(username="author")
+        for number in range(3):
+            cls._create_recipe(number)
+
+    @classmethod
+    def _create_recipe(cls, number):
+        return Recipe.objects.create(
+            author=cls.author,
+            name=f"рецепт {number}",
+            image=None,
+            text="описание",
+            cooking_time=5,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url)
+        return response.json()["count"], len(
+            [query for query in context if "COUNT(" in query["sql"]]
+        )
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_cached_count(self):
+        self.assertEqual(self._count_queries("/api/recipes/"), (3, 1))
+        self.assertEqual(self._count_queries("/api/recipes/?page=1"), (3, 0))
+        self._create_recipe(3)
+        self.assertEqual(self._count_queries("/api/recipes/"), (4, 1))
+        self.assertEqual(
+            self._count_queries(f"/api/recipes/?author={self.author.id}"),
+            (4, 1),
+        )
+        self.assertEqual(
+            self._count_queries(f"/api/recipes/?author={self.author.id}"),
+            (4, 0),
+        )
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_stale_count_does_not_hide_pages(self):
+        self.assertEqual(self._count_queries("/api/recipes/?limit=2"), (3, 1))
+        # bulk_create sends no signals, so the cached count goes stale.
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=self.author,
+                name="рецепт",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            for _ in range(2)
+        )
+        response = self.guest_client.get("/api/recipes/?limit=2&page=3")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 5)
+        self.assertEqual(len(response.json()["results"]), 1)
+        response = self.guest_client.get("/api/recipes/?limit=2&page=4")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_filtered_count_is_shared_between_users(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="user"))
+        url = f"/api/recipes/?author={self.author.id}"
+        self.assertEqual(self._count_queries(url), (3, 1))
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.json()["count"], 3)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in context))
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_favorited_count_follows_toggles(self):
+        user = User.objects.create_user(username="user")
+        other = User.objects.create_user(username="other")
+        client = APIClient()
+        client.force_authenticate(user)
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        recipes = list(Recipe.objects.all())
+        url = "/api/recipes/?is_favorited=1&limit=2"
+        self.assertEqual(other_client.get(url).json()["count"], 0)
+        self.assertEqual(self._count_queries("/api/recipes/"), (3, 1))
+        for number, recipe in enumerate(recipes, start=1):
+            client.post(f"/api/recipes/{recipe.id}/favorite/")
+            response = client.get(f"{url}&page={(number + 1) // 2}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["count"], number)
+        client.delete(f"/api/recipes/{recipes[0].id}/favorite/")
+        response = client.get(url)
+        self.assertEqual(response.json()["count"], len(recipes) - 1)
+        # Toggles of one user keep the counts of other lists.
+        self.assertEqual(self._count_queries("/api/recipes/"), (3, 0))
+        with CaptureQueriesContext(connection) as context:
+            response = other_client.get(url)
+        self.assertEqual(response.json()["count"], 0)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in context))
+
+    def test_count_is_not_cached_without_timeout(self):
+        self.assertEqual(self._count_queries("/api/recipes/"), (3, 1))
+        self._create_recipe(3)
+        self.assertEqual(self._count_queries("/api/recipes/"), (4, 1))
+
+    def test_approximate_count(self):
+        with mock.patch(
+            "recipes.pagination.estimate_count", return_value=50000
+        ):
+            self.assertEqual(self._count_queries("/api/recipes/"), (50000, 0))
+        with mock.patch("recipes.pagination.estimate_count", return_value=5):
+            self.assertEqual(self._count_queries("/api/recipes/"), (3, 1))
+
+    def test_estimate_count_requires_postgresql(self):
+        self.assertIsNone(estimate_count(Recipe.objects.all()))
@@ -8,7 +8,7 @@ from django.test import TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from users.models import User
+from users.models import Subscription, User
 
 from ..models import (Favorite, Ingredient, IngredientAmount, Recipe,
                       ShoppingCart, Tag)
@@ -211,6 +211,66 @@ class RecipeTest(TestCase):
         }
         self.assertEqual(response.json(), test_json)
 
+    def test_get_recipes_list_num_queries(self):
+        url = "/api/recipes/?limit=50"
+        # count, recipes + authors, tags, ingredients
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for number in range(10):
+            recipe = Recipe.objects.create(
+                author=self.test_user,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=4,
+            )
+            recipe.tags.add(self.tag_breakfast, self.tag_dinner)
+            recipe.ingredients.add(
+                self.ingredientamount_orange,
+                self.ingredientamount_jam,
+            )
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 12)
+
+    def test_get_recipes_list_num_queries_authorized_client(self):
+        url = "/api/recipes/?limit=50"
+        for number in range(10):
+            recipe = Recipe.objects.create(
+                author=self.test_user,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=4,
+            )
+            recipe.tags.add(self.tag_breakfast)
+            if number % 2:
+                Favorite.objects.create(user=self.user, recipe=recipe)
+            else:
+                ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        Subscription.objects.create(user=self.user, author=self.test_user)
+        # count, recipes with flags, authors, tags, ingredients
+        with self.assertNumQueries(5):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for recipe in response.json()["results"]:
+            recipe_from_test_user = recipe["author"]["id"] == self.test_user.id
+            self.assertEqual(
+                recipe["author"]["is_subscribed"], recipe_from_test_user
+            )
+            self.assertEqual(
+                recipe["is_favorited"] or recipe["is_in_shopping_cart"],
+                recipe_from_test_user,
+            )
+
+    def test_get_recipe_detail_num_queries(self):
+        url = f"/api/recipes/{self.recipe_breakfast.id}/"
+        with self.assertNumQueries(3):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_get_recipe_detail_unauthorized_client(self):
         url = f"/api/recipes/{self.user.id}/"
         response = self.guest_client.get(url)
@@ -1219,6 +1279,54 @@ class RecipeTest(TestCase):
         ]
         self.assertEqual(sorted(tag_recipes_id), sorted(test_recipes_id))
 
+    def test_get_recipes_filter_by_several_tags(self):
+        recipe = Recipe.objects.create(
+            author=self.test_user,
+            name="тестовый рецепт тег 1 и 2",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        recipe.tags.add(self.tag_breakfast, self.tag_dinner)
+        url = (
+            f"/api/recipes/?tags={self.tag_breakfast.slug}"
+            f"&tags={self.tag_dinner.slug}"
+        )
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        test_recipes_id = [
+            recipe["id"] for recipe in response.json()["results"]
+        ]
+        self.assertEqual(
+            test_recipes_id,
+            [recipe.id, self.recipe.id, self.recipe_breakfast.id],
+        )
+        response = self.authorized_client.get(url + "&tags_match=all")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        test_recipes_id = [
+            recipe["id"] for recipe in response.json()["results"]
+        ]
+        self.assertEqual(test_recipes_id, [recipe.id])
+
+    def test_get_recipes_filter_by_unknown_tag(self):
+        response = self.authorized_client.get("/api/recipes/?tags=unknown")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_recipes_filter_by_name(self):
+        recipe = Recipe.objects.create(
+            author=self.test_user,
+            name="Pancakes",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        response = self.authorized_client.get("/api/recipes/?name=cake")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        test_recipes_id = [
+            recipe["id"] for recipe in response.json()["results"]
+        ]
+        self.assertEqual(test_recipes_id, [recipe.id])
+
     def test_get_recipes_filter_by_is_favorited(self):
         test_user = User.objects.create(username="test_user")
         recipe_1 = Recipe.objects.create(
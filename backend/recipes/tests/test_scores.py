@@ -0,0 +1,182 @@
+import io
+import math
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import Favorite, Recipe, RecipeScore, ShoppingCart
+from ..scores import event_score, initial_score
+
+URL = "/api/recipes/"
+
+
+class RecipeOrderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        cls.users = [
+            User.objects.create_user(username=f"user_{number}")
+            for number in range(3)
+        ]
+        cls.author = cls.users[0]
+        half_life = timedelta(
+            hours=settings.RECIPE_TRENDING["HALF_LIFE_HOURS"]
+        )
+        with mock.patch(
+            "recipes.scores.timezone.now",
+            return_value=timezone.now() - 10 * half_life,
+        ):
+            cls.old = cls._create_recipe("старый")
+            for user in cls.users:
+                Favorite.objects.create(user=user, recipe=cls.old)
+        cls.fresh = cls._create_recipe("свежий")
+        cls.quiet = cls._create_recipe("тихий")
+        Favorite.objects.create(user=cls.users[1], recipe=cls.fresh)
+        ShoppingCart.objects.create(user=cls.users[1], recipe=cls.fresh)
+
+    @classmethod
+    def _create_recipe(cls, name):
+        return Recipe.objects.create(
+            author=cls.author,
+            name=name,
+            image=None,
+            text="описание",
+            cooking_time=5,
+        )
+
+    def _ids(self, query):
+        response = self.guest_client.get(f"{URL}{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe["id"] for recipe in response.json()["results"]]
+
+    def test_popular(self):
+        self.assertEqual(
+            self._ids("?ordering=popular"),
+            [self.old.id, self.fresh.id, self.quiet.id],
+        )
+
+    def test_trending(self):
+        self.assertEqual(
+            self._ids("?ordering=trending"),
+            [self.fresh.id, self.quiet.id, self.old.id],
+        )
+
+    def test_trending_uses_inner_join(self):
+        with CaptureQueriesContext(connection) as context:
+            self._ids("?ordering=trending")
+        page_query = context[1]["sql"]
+        self.assertIn('INNER JOIN "recipes_recipescore"', page_query)
+        self.assertNotIn("COALESCE", page_query)
+
+    def test_trending_after_reconcile(self):
+        RecipeScore.objects.filter(recipe=self.quiet).delete()
+        self.assertEqual(
+            self._ids("?ordering=trending"), [self.fresh.id, self.old.id]
+        )
+        call_command("reconcile_counters", stdout=io.StringIO())
+        self.assertIn(self.quiet.id, self._ids("?ordering=trending"))
+
+    def test_default_ordering(self):
+        self.assertEqual(
+            self._ids(""), [self.quiet.id, self.fresh.id, self.old.id]
+        )
+
+    def test_ordering_with_filters(self):
+        self.assertEqual(
+            self._ids(f"?ordering=popular&author={self.author.id}&limit=2"),
+            [self.old.id, self.fresh.id],
+        )
+
+    def test_ordering_does_not_aggregate(self):
+        for ordering in ("popular", "trending"):
+            with self.subTest(ordering=ordering):
+                with CaptureQueriesContext(connection) as context:
+                    self._ids(f"?ordering={ordering}")
+                page_query = context[1]["sql"]
+                self.assertIn("ORDER BY", page_query)
+                self.assertNotIn("GROUP BY", page_query)
+
+    def test_invalid_ordering(self):
+        response = self.guest_client.get(f"{URL}?ordering=random")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_rejects_ordering(self):
+        response = self.guest_client.get(
+            f"{URL}?pagination=cursor&ordering=popular"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", response.json())
+
+
+class RecipeScoreTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name="рецепт",
+            image=None,
+            text="описание",
+            cooking_time=5,
+        )
+
+    def test_events_are_added_in_log_space(self):
+        moment = timezone.now()
+        RecipeScore.objects.filter(recipe=self.recipe).delete()
+        RecipeScore.objects.add_event(self.recipe.id, 1.0, moment)
+        RecipeScore.objects.add_event(self.recipe.id, 3.0, moment)
+        self.assertAlmostEqual(
+            RecipeScore.objects.get(recipe=self.recipe).trending,
+            event_score(4.0, moment),
+        )
+
+    def test_zero_weight_is_ignored(self):
+        self.assertIsNone(event_score(0))
+        trending = RecipeScore.objects.get(recipe=self.recipe).trending
+        RecipeScore.objects.add_event(self.recipe.id, 0)
+        self.assertEqual(
+            RecipeScore.objects.get(recipe=self.recipe).trending, trending
+        )
+        with mock.patch.dict(
+            settings.RECIPE_TRENDING,
+            RECIPE_WEIGHT=0,
+            FAVORITE_WEIGHT=0,
+            SHOPPING_CART_WEIGHT=0,
+        ):
+            self.assertEqual(initial_score(), 0.0)
+            Recipe.objects.create(
+                author=self.author,
+                name="без веса",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+
+    def test_half_life(self):
+        moment = timezone.now()
+        half_life = timedelta(
+            hours=settings.RECIPE_TRENDING["HALF_LIFE_HOURS"]
+        )
+        self.assertAlmostEqual(
+            event_score(1.0, moment + half_life) - event_score(1.0, moment),
+            math.log(2),
+        )
+
+    def test_reconcile_creates_missing_scores(self):
+        RecipeScore.objects.all().delete()
+        stdout = io.StringIO()
+        call_command("reconcile_counters", stdout=stdout)
+        self.assertIn("рейтингов: 1", stdout.getvalue())
+        self.assertTrue(
+            RecipeScore.objects.filter(recipe=self.recipe).exists()
+        )
@@ -0,0 +1,110 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..cache import get_cache
+from ..filters import IngredientSearchFilter, filter_by_name
+from ..models import Ingredient, Recipe
+from ..search import IngredientIndex
+
+
+class IngredientIndexTest(TestCase):
+    def setUp(self):
+        self.index = IngredientIndex()
+        self.index.build(
+            [
+                (1, "морская соль"),
+                (2, "Соль поваренная"),
+                (3, "соль"),
+                (4, "Ёжевика"),
+                (5, "сахар"),
+            ]
+        )
+        self.index.refresh = lambda: None
+
+    def test_prefix_matches_go_first(self):
+        self.assertEqual(self.index.search("соль"), ([3, 2], [1]))
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.index.search("СОЛЬ П"), ([2], []))
+        self.assertEqual(self.index.search("ОЛЬ"), ([], [1, 3, 2]))
+
+    def test_search_folds_yo(self):
+        self.assertEqual(self.index.search("еж"), ([4], []))
+        self.assertEqual(self.index.search("ёжевик"), ([4], []))
+
+    def test_short_substring(self):
+        self.assertEqual(self.index.search("х"), ([], [5]))
+        self.assertEqual(self.index.search("xyz"), ([], []))
+
+
+class IngredientSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        cls.salt_sea = Ingredient.objects.create(
+            name="морская соль",
+            measurement_unit="г",
+        )
+        cls.salt = Ingredient.objects.create(
+            name="соль",
+            measurement_unit="г",
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def _search(self, value):
+        response = self.guest_client.get(f"/api/ingredients/?name={value}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ingredient["id"] for ingredient in response.json()]
+
+    def test_search_keeps_prefix_matches_first(self):
+        expected_ids = [self.salt.id, self.salt_sea.id]
+        self.assertEqual(self._search("соль"), expected_ids)
+        self.assertEqual(self._search("СОЛЬ"), expected_ids)
+
+    def test_index_refreshes_on_ingredient_change(self):
+        self.assertEqual(self._search("перец"), [])
+        pepper = Ingredient.objects.create(name="перец", measurement_unit="г")
+        self.assertEqual(self._search("перец"), [pepper.id])
+
+    @override_settings(INGREDIENT_SEARCH_ENGINE="database")
+    def test_database_engine_keeps_prefix_matches_first(self):
+        expected_ids = [self.salt.id, self.salt_sea.id]
+        self.assertEqual(self._search("соль"), expected_ids)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_ingredient_search", queries=5, stdout=out)
+        self.assertIn("index", out.getvalue())
+        self.assertIn("orm", out.getvalue())
+
+    def test_benchmark_command_needs_two_queries(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "benchmark_ingredient_search", queries=1, stdout=StringIO()
+            )
+
+
+class TrigramSearchQueryTest(TestCase):
+    @mock.patch("recipes.filters.uses_trigram_index", return_value=True)
+    def test_recipe_name_search_uses_lower_name(self, _):
+        query = str(filter_by_name(Recipe.objects.all(), "БОРЩ").query)
+        self.assertIn('LOWER("recipes_recipe"."name")', query)
+        self.assertIn("%борщ%", query)
+
+    @mock.patch("recipes.filters.uses_trigram_index", return_value=True)
+    def test_ingredient_search_is_single_query(self, _):
+        filterset = IngredientSearchFilter(queryset=Ingredient.objects.all())
+        query = str(
+            filterset.search_in_database(Ingredient.objects.all(), "Соль")
+            .query
+        )
+        self.assertNotIn("UNION", query)
+        self.assertIn('LOWER("recipes_ingredient"."name")', query)
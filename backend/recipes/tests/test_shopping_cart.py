@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+import unittest
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..exporters import canvas
+from ..models import (Ingredient, IngredientAmount, Recipe, ShoppingCart,
+                      ShoppingListItem, Tag)
+
+
+class DownloadShoppingCartTest(TestCase):
+    url = "/api/recipes/download_shopping_cart/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="authorized_user")
+        cls.authorized_client = APIClient()
+        cls.authorized_client.force_authenticate(cls.user)
+        cls.author = User.objects.create_user(username="author")
+        cls.tag = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.orange = Ingredient.objects.create(
+            name="апельсин",
+            measurement_unit="шт.",
+        )
+        cls.jam = Ingredient.objects.create(
+            name="варенье",
+            measurement_unit="ложка",
+        )
+        cls.recipe_1 = cls._create_recipe(((cls.orange, 5), (cls.jam, 1)))
+        cls.recipe_2 = cls._create_recipe(((cls.orange, 2),))
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe_1)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe_2)
+
+    @classmethod
+    def _create_recipe(cls, ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name="тестовый рецепт",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        recipe.tags.add(cls.tag)
+        for ingredient, amount in ingredients:
+            recipe.ingredients.add(
+                IngredientAmount.objects.create(
+                    ingredient=ingredient,
+                    amount=amount,
+                )
+            )
+        return recipe
+
+    def _download(self, *args, **kwargs):
+        response = self.authorized_client.get(*args, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_download_text_by_default(self):
+        response, content = self._download(self.url)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; charset=utf-8"
+        )
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="shopping_list.txt"',
+        )
+        self.assertEqual(
+            content,
+            "Список покупок:\n"
+            "1. апельсин - 7 шт.\n"
+            "2. варенье - 1 ложка\n",
+        )
+
+    def test_download_csv_by_query_parameter(self):
+        response, content = self._download(self.url, {"format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(
+            rows[1:],
+            [["апельсин", "7", "шт."], ["варенье", "1", "ложка"]],
+        )
+
+    def test_download_json_by_accept_header(self):
+        response, content = self._download(
+            self.url, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(
+            json.loads(content),
+            [
+                {"name": "апельсин", "amount": 7, "measurement_unit": "шт."},
+                {"name": "варенье", "amount": 1, "measurement_unit": "ложка"},
+            ],
+        )
+
+    def test_download_respects_accept_quality(self):
+        for accept, content_type in (
+            (
+                "text/plain;q=0.1, application/json",
+                "application/json; charset=utf-8",
+            ),
+            ("text/*, text/csv", "text/csv; charset=utf-8"),
+            ("application/json;q=0, */*", "text/plain; charset=utf-8"),
+        ):
+            with self.subTest(accept=accept):
+                response, _ = self._download(self.url, HTTP_ACCEPT=accept)
+                self.assertEqual(response["Content-Type"], content_type)
+
+    def test_download_empty_json(self):
+        ShoppingCart.objects.filter(user=self.user).delete()
+        _, content = self._download(self.url, {"format": "json"})
+        self.assertEqual(json.loads(content), [])
+
+    @unittest.skipIf(canvas is None, "reportlab is not installed")
+    def test_download_pdf(self):
+        response = self.authorized_client.get(self.url, {"format": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(b"%PDF"))
+
+    def test_download_unknown_format(self):
+        response = self.authorized_client.get(self.url, {"format": "xml"})
+        self.assertEqual(
+            response.status_code, status.HTTP_406_NOT_ACCEPTABLE
+        )
+
+
+class ShoppingListItemTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="authorized_user")
+        cls.authorized_client = APIClient()
+        cls.authorized_client.force_authenticate(cls.user)
+        cls.author = User.objects.create_user(username="author")
+        cls.author_client = APIClient()
+        cls.author_client.force_authenticate(cls.author)
+        cls.tag = Tag.objects.create(
+            name="test Завтрак",
+            color="#6AA84F",
+            slug="breakfast",
+        )
+        cls.orange = Ingredient.objects.create(
+            name="апельсин",
+            measurement_unit="шт.",
+        )
+        cls.jam = Ingredient.objects.create(
+            name="варенье",
+            measurement_unit="ложка",
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name="тестовый рецепт",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        cls.recipe.tags.add(cls.tag)
+        cls.recipe.ingredients.add(
+            IngredientAmount.objects.create(ingredient=cls.orange, amount=5),
+            IngredientAmount.objects.create(ingredient=cls.jam, amount=1),
+        )
+
+    def _shopping_list(self):
+        return dict(
+            ShoppingListItem.objects.filter(user=self.user).values_list(
+                "ingredient__name", "amount"
+            )
+        )
+
+    def test_shopping_cart_action_updates_shopping_list(self):
+        url = f"/api/recipes/{self.recipe.id}/shopping_cart/"
+        self.authorized_client.post(url)
+        self.assertEqual(
+            self._shopping_list(), {"апельсин": 5, "варенье": 1}
+        )
+        self.authorized_client.delete(url)
+        self.assertEqual(self._shopping_list(), {})
+
+    def test_recipe_update_updates_shopping_list(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        data = {
+            "ingredients": [{"id": self.orange.id, "amount": 3}],
+            "tags": [self.tag.id],
+            "name": "тестовый рецепт",
+            "text": "описание",
+            "cooking_time": 4,
+        }
+        response = self.author_client.patch(
+            f"/api/recipes/{self.recipe.id}/", data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._shopping_list(), {"апельсин": 3})
+
+    def test_recipe_delete_updates_shopping_list(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        self.recipe.delete()
+        self.assertEqual(self._shopping_list(), {})
+
+    def test_recipe_queryset_delete_keeps_other_recipes(self):
+        other = Recipe.objects.create(
+            author=self.author,
+            name="другой рецепт",
+            image=None,
+            text="описание",
+            cooking_time=4,
+        )
+        other.ingredients.add(self.recipe.ingredients.get(amount=5))
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=other)
+        Recipe.objects.filter(pk=self.recipe.pk).delete()
+        self.assertEqual(self._shopping_list(), {"апельсин": 5})
+
+    def test_shopping_cart_removal_sends_only_post_delete(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        signals = []
+
+        def receiver(signal, **kwargs):
+            signals.append(signal)
+
+        for signal in (pre_delete, post_delete):
+            signal.connect(receiver, sender=ShoppingCart)
+            self.addCleanup(
+                signal.disconnect, receiver, sender=ShoppingCart
+            )
+        self.authorized_client.delete(
+            f"/api/recipes/{self.recipe.id}/shopping_cart/"
+        )
+        self.assertEqual(signals, [post_delete])
+        self.assertEqual(self._shopping_list(), {})
+
+    def test_apply_delta_upserts_amounts(self):
+        ShoppingListItem.objects.create(
+            user=self.user, ingredient=self.orange, amount=5
+        )
+        with CaptureQueriesContext(connection) as context:
+            ShoppingListItem.objects.apply_delta(
+                [self.user.pk], {self.orange.pk: 3, self.jam.pk: 2}
+            )
+        inserts = [
+            query["sql"]
+            for query in context
+            if query["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn("ON CONFLICT", inserts[0])
+        self.assertEqual(self._shopping_list(), {"апельсин": 8, "варенье": 2})
+        ShoppingListItem.objects.apply_delta(
+            [self.user.pk], {self.orange.pk: -10, self.jam.pk: -1}
+        )
+        self.assertEqual(self._shopping_list(), {"варенье": 1})
+
+    def test_rebuild_shopping_lists(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingListItem.objects.filter(ingredient=self.orange).update(
+            amount=100
+        )
+        ShoppingListItem.objects.filter(ingredient=self.jam).delete()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_shopping_lists", verify=True)
+        call_command("rebuild_shopping_lists", stdout=io.StringIO())
+        self.assertEqual(
+            self._shopping_list(), {"апельсин": 5, "варенье": 1}
+        )
+        call_command(
+            "rebuild_shopping_lists", verify=True, stdout=io.StringIO()
+        )
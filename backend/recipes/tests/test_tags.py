@@ -6,6 +6,7 @@ from rest_framework.test import APIClient
 
 from users.models import User
 
+from ..cache import get_cache
 from ..models import Tag
 
 
@@ -27,6 +28,9 @@ class TagTest(TestCase):
             slug="dinner",
         )
 
+    def setUp(self):
+        get_cache().clear()
+
     def test_cool_test(self):
         """Cool test."""
         self.assertEqual(True, True)
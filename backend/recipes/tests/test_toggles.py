@@ -0,0 +1,244 @@
+import threading
+from collections import Counter
+from unittest import mock
+
+from django.db import connection, connections
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import Subscription, User, UserStats
+
+from ..models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                      ShoppingCart, ShoppingListItem)
+from ..relations import add_relation
+from ..views import RecipeViewSet
+
+THREADS = 8
+
+
+def create_recipe(author):
+    return Recipe.objects.create(
+        author=author,
+        name="рецепт",
+        image=None,
+        text="описание",
+        cooking_time=5,
+    )
+
+
+def data_queries(context):
+    return [
+        query["sql"]
+        for query in context
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+
+class ToggleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.author = User.objects.create_user(username="author")
+        cls.recipe = create_recipe(cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_delete_is_single_statement(self):
+        for model, action in (
+            (Favorite, "favorite"),
+            (ShoppingCart, "shopping_cart"),
+        ):
+            with self.subTest(action=action):
+                model.objects.create(user=self.user, recipe=self.recipe)
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.delete(
+                        f"/api/recipes/{self.recipe.id}/{action}/"
+                    )
+                self.assertEqual(
+                    response.status_code, status.HTTP_204_NO_CONTENT
+                )
+                queries = data_queries(context)
+                self.assertTrue(queries[0].startswith("DELETE"))
+                self.assertFalse(
+                    any(query.startswith("SELECT 1") for query in queries)
+                )
+
+    def test_post_inserts_once(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                f"/api/recipes/{self.recipe.id}/favorite/"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        inserts = [
+            query
+            for query in data_queries(context)
+            if query.startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn("ON CONFLICT DO NOTHING", inserts[0])
+
+    def test_post_loads_only_short_recipe_columns(self):
+        for action in ("favorite", "shopping_cart"):
+            with self.subTest(action=action):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.post(
+                        f"/api/recipes/{self.recipe.id}/{action}/"
+                    )
+                self.assertEqual(
+                    response.status_code, status.HTTP_201_CREATED
+                )
+                self.assertEqual(
+                    set(response.json()),
+                    {"id", "name", "image", "cooking_time"},
+                )
+                selects = [
+                    query
+                    for query in data_queries(context)
+                    if query.startswith("SELECT")
+                    and 'FROM "recipes_recipe"' in query
+                ]
+                self.assertEqual(len(selects), 1)
+                self.assertNotIn('"text"', selects[0])
+                self.assertNotIn('"author_id"', selects[0])
+
+    def test_missing_objects(self):
+        for method, url in (
+            ("post", "/api/recipes/0/favorite/"),
+            ("delete", "/api/recipes/0/favorite/"),
+            ("delete", "/api/recipes/abc/shopping_cart/"),
+            ("post", "/api/users/0/subscribe/"),
+            ("delete", "/api/users/0/subscribe/"),
+        ):
+            with self.subTest(method=method, url=url):
+                response = getattr(self.client, method)(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+    def test_target_deleted_concurrently(self):
+        missing = Recipe(pk=self.recipe.pk + 1000, name="рецепт")
+        with mock.patch.object(
+            RecipeViewSet, "_get_short_recipe", return_value=missing
+        ):
+            response = self.client.post(
+                f"/api/recipes/{missing.pk}/favorite/"
+            )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        with self.assertRaises(Http404):
+            add_relation(
+                Subscription, user_id=self.user.pk, author_id=missing.pk
+            )
+        self.assertFalse(Favorite.objects.exists())
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_shopping_list_follows_toggles(self):
+        url = f"/api/recipes/{self.recipe.id}/shopping_cart/"
+        self.client.post(url)
+        self.assertTrue(
+            ShoppingCart.objects.filter(
+                user=self.user, recipe=self.recipe
+            ).exists()
+        )
+        self.client.delete(url)
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.user).exists()
+        )
+
+
+class ConcurrentToggleTest(TransactionTestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user_{number}")
+            for number in range(2)
+        ]
+        self.author = User.objects.create_user(username="author")
+        self.recipe = create_recipe(self.author)
+
+    def _fire(self, method, url, user):
+        return self._fire_all(method, [url] * THREADS, user)
+
+    def _fire_all(self, method, urls, user):
+        barrier = threading.Barrier(len(urls))
+        statuses = []
+
+        def request(url):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                response = getattr(client, method)(url)
+            finally:
+                connections.close_all()
+            statuses.append(response.status_code)
+
+        threads = [
+            threading.Thread(target=request, args=(url,)) for url in urls
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return Counter(statuses)
+
+    def test_parallel_favorite(self):
+        url = f"/api/recipes/{self.recipe.id}/favorite/"
+        user = self.users[0]
+        self.assertEqual(
+            self._fire("post", url, user),
+            {
+                status.HTTP_201_CREATED: 1,
+                status.HTTP_400_BAD_REQUEST: THREADS - 1,
+            },
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(
+            self._fire("delete", url, user),
+            {
+                status.HTTP_204_NO_CONTENT: 1,
+                status.HTTP_400_BAD_REQUEST: THREADS - 1,
+            },
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_parallel_subscribe(self):
+        url = f"/api/users/{self.author.id}/subscribe/"
+        user = self.users[1]
+        self.assertEqual(
+            self._fire("post", url, user),
+            {
+                status.HTTP_201_CREATED: 1,
+                status.HTTP_400_BAD_REQUEST: THREADS - 1,
+            },
+        )
+        self.assertEqual(Subscription.objects.count(), 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).subscribers_count, 1
+        )
+
+    def test_parallel_first_time_shopping_list_adds(self):
+        ingredient = Ingredient.objects.create(
+            name="мука", measurement_unit="г"
+        )
+        amounts = IngredientAmount.objects.bulk_get_or_create(
+            [(ingredient.pk, 10)]
+        )
+        urls = []
+        for _ in range(THREADS):
+            recipe = create_recipe(self.author)
+            recipe.ingredients.set(amounts)
+            urls.append(f"/api/recipes/{recipe.id}/shopping_cart/")
+        user = self.users[0]
+        self.assertEqual(
+            self._fire_all("post", urls, user),
+            {status.HTTP_201_CREATED: THREADS},
+        )
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=user).amount, 10 * THREADS
+        )
@@ -1,78 +1,180 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
+from users.models import User, annotate_is_subscribed
+from users.serializers import CustomUserSerializer
+from . import cache
+from .cache import CachedReadOnlyMixin
+from .exporters import IgnoreClientContentNegotiation, get_exporter
 from .filters import IngredientSearchFilter, RecipeFilter
 from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                     ShoppingCart, Tag)
-from .pagination import RecipePagination
+                     ShoppingCart, ShoppingListItem, Tag)
+from .pagination import APPROXIMATE, RecipePagination
 from .permissions import IsAuthorOrAdminOrIsAuthenticatedOrReadOnly
-from .serializers import (IngredientSerializer, RecipeReadSerializer,
-                          RecipeWriteSerializer,
-                          ShortRecipeSerializer, TagSerializer)
+from .relations import (add_relation, apply_relation_batch, remove_relation,
+                        to_pk)
+from .serializers import (IngredientSerializer, RecipeCardSerializer,
+                          RecipeReadSerializer, RecipeWriteSerializer,
+                          RelationBatchSerializer, ShortRecipeSerializer,
+                          TagSerializer)
 
+SHOPPING_LIST_CHUNK_SIZE = 2000
+CARD_VIEW = "card"
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_namespace = cache.TAGS
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientSearchFilter
+    cache_namespace = cache.INGREDIENTS
+
+    def get_queryset(self):
+        selected = self.serializer_class.get_selected_fields(self.request)
+        return super().get_queryset().only(
+            *self.serializer_class.get_model_columns(selected)
+        )
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = RecipePagination
+    pagination_count_mode = APPROXIMATE
     permission_classes = (IsAuthorOrAdminOrIsAuthenticatedOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def is_card_view(self):
+        view = self.request.query_params.get("view")
+        if view not in (None, CARD_VIEW):
+            raise ValidationError(
+                {"view": f"Допустимое значение: {CARD_VIEW}."}
+            )
+        return view == CARD_VIEW
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
+            if self.is_card_view():
+                return RecipeCardSerializer
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def _annotate_user_flags(self, queryset, selected):
+        user = self.request.user
+        annotations = {}
+        for name, model in (
+            ("is_favorited", Favorite),
+            ("is_in_shopping_cart", ShoppingCart),
+        ):
+            if name not in selected:
+                continue
+            if not user.is_authenticated:
+                annotations[name] = Value(False)
+                continue
+            annotations[name] = Exists(
+                model.objects.filter(user=user, recipe=OuterRef("pk"))
+            )
+        return queryset.annotate(**annotations)
+
+    def _get_author_lookup(self):
+        authors = User.objects.only(
+            *CustomUserSerializer.get_model_columns(
+                CustomUserSerializer.Meta.fields
+            )
+        )
+        return Prefetch(
+            "author",
+            queryset=annotate_is_subscribed(authors, self.request.user),
+        )
+
+    def get_queryset(self):
+        if self.action not in ("list", "retrieve"):
+            return super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        selected = serializer_class.get_selected_fields(self.request)
+        columns = serializer_class.get_model_columns(selected)
+        queryset = self._annotate_user_flags(
+            super().get_queryset().only(*columns), selected
+        )
+        lookups = []
+        if "author" in selected:
+            if not self.request.user.is_authenticated:
+                queryset = queryset.select_related("author")
+            else:
+                lookups.append(self._get_author_lookup())
+        if "tags" in selected:
+            lookups.append("tags")
+        if "ingredients" in selected:
+            lookups.append(
+                Prefetch(
+                    "ingredients",
+                    queryset=IngredientAmount.objects.select_related(
+                        "ingredient"
+                    ),
+                )
+            )
+        return queryset.prefetch_related(*lookups)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    def _do_post_method(self, request, model, error_data):
-        user = request.user
-        recipe = self.get_object()
-        if model.objects.filter(
-                user=user,
-                recipe=recipe,
-        ).exists():
-            return Response(error_data, status=status.HTTP_400_BAD_REQUEST)
-        model.objects.create(
-            user=user,
-            recipe=recipe,
-        )
-        serializer = ShortRecipeSerializer(
-            recipe,
-            context={"request": request},
+    def _get_recipe_id(self):
+        return to_pk(Recipe, self.kwargs[self.lookup_field])
+
+    def _get_short_recipe(self):
+        # The toggles only need the columns of ShortRecipeSerializer and
+        # no object permissions, so get_object() is skipped.
+        return get_object_or_404(
+            Recipe.objects.only(*ShortRecipeSerializer.model_fields),
+            pk=self._get_recipe_id(),
         )
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _do_post_method(self, request, model, error_data):
+        recipe = self._get_short_recipe()
+        if add_relation(model, user_id=request.user.pk, recipe_id=recipe.pk):
+            serializer = ShortRecipeSerializer(
+                recipe,
+                context={"request": request},
+            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(error_data, status=status.HTTP_400_BAD_REQUEST)
 
     def _do_delete_method(self, request, model, error_data):
-        user = request.user
-        recipe = self.get_object()
-        favorite = model.objects.filter(
-            user=user,
-            recipe=recipe,
-        )
-        if favorite.exists():
-            favorite.delete()
+        recipe_id = self._get_recipe_id()
+        if remove_relation(
+            model,
+            user_id=request.user.pk,
+            recipe_id=recipe_id,
+        ):
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe.objects.only("pk"), pk=recipe_id)
         return Response(error_data, status=status.HTTP_400_BAD_REQUEST)
 
+    def _do_batch_method(self, request, model):
+        serializer = RelationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_relation_batch(
+            model,
+            {"user_id": request.user.pk},
+            "recipe_id",
+            Recipe.objects.all(),
+            **serializer.validated_data,
+        )
+        return Response({"results": results})
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -99,42 +201,49 @@ class RecipeViewSet(viewsets.ModelViewSet):
         error_data = {"errors": "Рецепт уже удален из корзины"}
         return self._do_delete_method(request, model, error_data)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="favorite/batch",
+        url_name="favorite-batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_batch(self, request):
+        return self._do_batch_method(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="shopping_cart/batch",
+        url_name="shopping-cart-batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_batch(self, request):
+        return self._do_batch_method(request, ShoppingCart)
+
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreClientContentNegotiation,
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredient_queryset = IngredientAmount.objects.filter(
-            recipes__shoppingcart__user=user
-        ).values(
+        exporter = get_exporter(request)
+        rows = ShoppingListItem.objects.filter(
+            user=request.user
+        ).order_by(
             "ingredient__name",
             "ingredient__measurement_unit",
-        ).annotate(
-            ingredient_sum=Sum('amount')
         ).values_list(
-            'ingredient__name',
-            'ingredient_sum',
-            'ingredient__measurement_unit',
+            "ingredient__name",
+            "amount",
+            "ingredient__measurement_unit",
+        ).iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            exporter.stream(rows),
+            content_type=exporter.content_type,
         )
-        shopping_cart = {}
-        for item in ingredient_queryset:
-            name = item[0]
-            if name not in shopping_cart:
-                shopping_cart[name] = {
-                    'amount': item[1],
-                    'measurement_unit': item[2],
-                }
-        filename = 'hopping_list.txt'
-        shopping_cart_text = 'Список покупок: '
-        for list_number, (name, data) in enumerate(shopping_cart.items(), 1):
-            shopping_cart_text += (
-                f'{list_number}. {name} - {data["amount"]} '
-                f'{data["measurement_unit"]}'
-            )
-        response = HttpResponse(
-            shopping_cart_text, content_type='text.txt; charset=utf-8'
+        response["Content-Disposition"] = (
+            f'attachment; filename="{exporter.filename}"'
         )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
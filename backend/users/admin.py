@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Subscription
+from .models import Subscription, UserStats
 
 
 @admin.register(Subscription)
@@ -10,3 +10,12 @@ class SubscriptionAdmin(admin.ModelAdmin):
         "user",
         "author",
     )
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "recipes_count",
+        "subscribers_count",
+    )
@@ -0,0 +1,137 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not self.maxsize or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    settings.TOKEN_AUTH_CACHE["MAXSIZE"],
+    settings.TOKEN_AUTH_CACHE["TTL"],
+)
+
+
+def _user_id_key(key):
+    return f"auth:token:{key}:user"
+
+
+def _version_key(user_id):
+    return f"auth:user:{user_id}:version"
+
+
+def get_shared_cache():
+    alias = settings.TOKEN_AUTH_CACHE["SHARED_ALIAS"]
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_user_version(shared_cache, user_id):
+    return shared_cache.get_or_set(
+        _version_key(user_id),
+        uuid.uuid4().hex,
+        settings.TOKEN_AUTH_CACHE["SHARED_TTL"],
+    )
+
+
+def invalidate_tokens(*keys):
+    for key in keys:
+        token_cache.delete(key)
+
+
+def invalidate_user(user_id):
+    # A new version makes every process drop its cached copies. It is
+    # bumped again on commit, so a lookup that read the old row just
+    # before the commit cannot keep it.
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return
+    key = _version_key(user_id)
+    shared_cache.delete(key)
+    transaction.on_commit(lambda: shared_cache.delete(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def _is_current(self, shared_cache, user_id, version):
+        # Without a shared cache the entry lives until its TTL: signals
+        # of this process drop it, other processes catch up on expiry.
+        return shared_cache is None or version == get_user_version(
+            shared_cache, user_id
+        )
+
+    def _load(self, key):
+        shared_cache = get_shared_cache()
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token, version = cached
+            if self._is_current(shared_cache, user.pk, version):
+                return user, token
+            token_cache.delete(key)
+        user_id = version = None
+        if shared_cache is not None:
+            user_id = shared_cache.get(_user_id_key(key))
+            if user_id is not None:
+                version = get_user_version(shared_cache, user_id)
+        user, token = super().authenticate_credentials(key)
+        if shared_cache is None:
+            token_cache.set(key, (user, token, None))
+        elif user_id is None:
+            # The version has to be read before the user, so the first
+            # lookup only remembers whose token it is.
+            shared_cache.set(
+                _user_id_key(key),
+                user.pk,
+                settings.TOKEN_AUTH_CACHE["SHARED_TTL"],
+            )
+        else:
+            token_cache.set(key, (user, token, version))
+        return user, token
+
+    def authenticate_credentials(self, key):
+        user, token = self._load(key)
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
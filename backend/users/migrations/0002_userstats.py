@@ -0,0 +1,86 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("user_id")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def fill_user_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserStats = apps.get_model("users", "UserStats")
+    Subscription = apps.get_model("users", "Subscription")
+    Recipe = apps.get_model("recipes", "Recipe")
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id)
+            for user_id in User.objects.values_list("pk", flat=True)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    UserStats.objects.update(
+        recipes_count=count_subquery(Recipe, "author"),
+        subscribers_count=count_subquery(Subscription, "author"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0001_initial"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                (
+                    "recipes_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Рецептов"
+                    ),
+                ),
+                (
+                    "subscribers_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Подписчиков"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика пользователя",
+                "verbose_name_plural": "Статистика пользователей",
+            },
+        ),
+        migrations.RunPython(
+            fill_user_stats,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
+
+from recipes.counters import change_counters
 
 User = get_user_model()
 
@@ -38,3 +41,52 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f"{self.user}_to_{self.author}"
+
+
+class UserStatsQuerySet(models.QuerySet):
+    def change(self, user_id, **deltas):
+        updated = change_counters(self.filter(user_id=user_id), **deltas)
+        if updated or all(delta <= 0 for delta in deltas.values()):
+            return
+        self.bulk_create([UserStats(user_id=user_id)], ignore_conflicts=True)
+        change_counters(self.filter(user_id=user_id), **deltas)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Рецептов",
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Подписчиков",
+    )
+
+    objects = UserStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Статистика пользователя"
+        verbose_name_plural = "Статистика пользователей"
+
+    def __str__(self):
+        return f"{self.user}"
+
+
+def annotate_is_subscribed(queryset, user):
+    if not user.is_authenticated:
+        return queryset.annotate(is_subscribed=Value(False))
+    return queryset.annotate(
+        is_subscribed=Exists(
+            Subscription.objects.filter(
+                user=user,
+                author=OuterRef("pk"),
+            )
+        )
+    )
@@ -1,6 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+from recipes.pagination import CountModePagination
 
 
-class UsersPagination(PageNumberPagination):
+class UsersPagination(CountModePagination):
     page_size = 6
     page_size_query_param = "limit"
@@ -1,12 +1,13 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes.fields import RenditionImageField
+from recipes.fieldsets import SparseFieldsetMixin
 from recipes.models import Recipe
-from .models import User
+from .models import User, UserStats
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(SparseFieldsetMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -21,6 +22,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context["request"].user
         return (
             user.is_authenticated
@@ -49,10 +52,20 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(
+    image = RenditionImageField(
+        rendition="thumbnail",
         max_length=None,
         use_url=True,
     )
+    # Columns enough to serialize a recipe and group it by author.
+    model_fields = (
+        "id",
+        "name",
+        "image",
+        "image_renditions",
+        "cooking_time",
+        "author",
+    )
 
     class Meta:
         model = Recipe
@@ -64,9 +77,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class UserSubscriptionSerializer(serializers.ModelSerializer):
+class UserSubscriptionSerializer(
+    SparseFieldsetMixin, serializers.ModelSerializer
+):
     is_subscribed = serializers.SerializerMethodField()
-    recipes = RecipeSerializer(many=True)
+    recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -83,6 +98,8 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context["request"].user
         return (
             user.is_authenticated
@@ -91,5 +108,20 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
             ).exists()
         )
 
+    def get_recipes(self, obj):
+        if hasattr(obj, "latest_recipes"):
+            recipes = obj.latest_recipes
+        else:
+            recipes = Recipe.objects.only(
+                *RecipeSerializer.model_fields
+            ).latest_by_author(
+                [obj.pk],
+                self.context.get("recipes_limit"),
+            )
+        return RecipeSerializer(recipes, many=True, context=self.context).data
+
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        if hasattr(obj, "recipes_count"):
+            return obj.recipes_count
+        stats = UserStats.objects.filter(user=obj).first()
+        return stats.recipes_count if stats else 0
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.pagination import invalidate_counts
+
+from .authentication import invalidate_tokens, invalidate_user
+from .models import Subscription, User, UserStats
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_tokens(instance.key)
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    invalidate_tokens(
+        *Token.objects.filter(user=instance).values_list("key", flat=True)
+    )
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Subscription)
+def increment_subscribers_count(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.change(instance.author_id, subscribers_count=1)
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_subscribers_count(sender, instance, **kwargs):
+    UserStats.objects.change(instance.author_id, subscribers_count=-1)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_page_counts(sender, created=True, **kwargs):
+    # Updates do not change the number of rows.
+    if created:
+        invalidate_counts()
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_subscription_counts(sender, instance, created=True, **kwargs):
+    if created:
+        invalidate_counts(instance.user_id)
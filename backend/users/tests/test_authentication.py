@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import (CachedTokenAuthentication, TokenCache,
+                                  invalidate_user, token_cache)
+from users.models import User
+
+URL = "/api/users/me/"
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="test_user",
+            password="1wkfy267snsndndnd",
+            email="test@mail.ru",
+        )
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _assert_authenticated(self, expected_status=status.HTTP_200_OK):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def test_cached_token_skips_database(self):
+        # token with user, subscription check
+        with self.assertNumQueries(2):
+            response = self._assert_authenticated()
+        self.assertEqual(response.json()["username"], "test_user")
+        with CaptureQueriesContext(connection) as context:
+            self._assert_authenticated()
+        self.assertFalse(
+            any("authtoken_token" in query["sql"] for query in context)
+        )
+        self.assertEqual(len(context), 1)
+
+    def test_revocation_in_other_process_after_ttl(self):
+        with mock.patch("users.authentication.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            self._assert_authenticated()
+            # Updates that bypass this process's signals.
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            monotonic.return_value = 129
+            self._assert_authenticated()
+            monotonic.return_value = 130
+            self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        authentication = CachedTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+        user.first_name = "изменено"
+        self.assertIs(token.user, user)
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.first_name, "")
+
+    def test_logout_invalidates_token(self):
+        self._assert_authenticated()
+        response = self.client.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_token(self):
+        self._assert_authenticated()
+        response = self.client.post(
+            "/api/users/set_password/",
+            {
+                "new_password": "qorperplfb56",
+                "current_password": "1wkfy267snsndndnd",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_deactivation_invalidates_token(self):
+        self._assert_authenticated()
+        self.user.is_active = False
+        self.user.save()
+        self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={
+            "MAXSIZE": 10,
+            "TTL": 30,
+            "SHARED_ALIAS": "default",
+            "SHARED_TTL": 300,
+        }
+    )
+    def test_shared_cache(self):
+        cache.clear()
+        self._assert_authenticated()
+        self.assertEqual(
+            cache.get(f"auth:token:{self.token.key}:user"), self.user.pk
+        )
+        self._assert_authenticated()
+        # Only the subscription check is left.
+        with self.assertNumQueries(1):
+            self._assert_authenticated()
+        for key in cache._cache:
+            self.assertNotIn(b"pbkdf2", cache._cache[key])
+        self.token.delete()
+        self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={
+            "MAXSIZE": 10,
+            "TTL": 30,
+            "SHARED_ALIAS": "default",
+            "SHARED_TTL": 300,
+        }
+    )
+    def test_shared_cache_revocation_in_other_process(self):
+        cache.clear()
+        self._assert_authenticated()
+        self._assert_authenticated()
+        # Another process deactivates the user and bumps the version.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_user(self.user.pk)
+        self._assert_authenticated(status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenCacheTest(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        lru = TokenCache(maxsize=2, ttl=30)
+        lru.set("first", 1)
+        lru.set("second", 2)
+        lru.get("first")
+        lru.set("third", 3)
+        self.assertEqual(lru.get("first"), 1)
+        self.assertIsNone(lru.get("second"))
+        self.assertEqual(lru.get("third"), 3)
+
+    def test_entry_expires(self):
+        lru = TokenCache(maxsize=2, ttl=30)
+        with mock.patch("users.authentication.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            lru.set("token", 1)
+            monotonic.return_value = 129
+            self.assertEqual(lru.get("token"), 1)
+            monotonic.return_value = 130
+            self.assertIsNone(lru.get("token"))
@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+
+class UserFieldsetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="user", email="user@example.org"
+        )
+        for number in range(2):
+            author = User.objects.create_user(username=f"author_{number}")
+            Recipe.objects.create(
+                author=author,
+                name="рецепт",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+            Subscription.objects.create(user=cls.user, author=author)
+        cls.author = author
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), [query["sql"] for query in context]
+
+    def test_users_list(self):
+        data, queries = self._get("/api/users/?fields=id,username")
+        for user in data["results"]:
+            self.assertEqual(set(user), {"id", "username"})
+        self.assertFalse(
+            any("users_subscription" in query for query in queries)
+        )
+        self.assertFalse(
+            any('"users_user"."email"' in query for query in queries)
+        )
+
+    def test_user_detail(self):
+        data, _ = self._get(f"/api/users/{self.author.id}/?omit=email")
+        self.assertNotIn("email", data)
+        self.assertTrue(data["is_subscribed"])
+
+    def test_subscriptions(self):
+        data, queries = self._get(
+            "/api/users/subscriptions/"
+            "?omit=recipes,recipes_count,is_subscribed"
+        )
+        for author in data["results"]:
+            self.assertEqual(
+                set(author),
+                {"email", "id", "username", "first_name", "last_name"},
+            )
+        self.assertFalse(
+            any('FROM "recipes_recipe"' in query for query in queries)
+        )
+        self.assertFalse(any("users_userstats" in query for query in queries))
+
+    def test_subscriptions_recipes_only(self):
+        data, _ = self._get(
+            "/api/users/subscriptions/?fields=id,recipes&recipes_limit=1"
+        )
+        for author in data["results"]:
+            self.assertEqual(set(author), {"id", "recipes"})
+            self.assertEqual(len(author["recipes"]), 1)
+
+    def test_unknown_fields(self):
+        for url in (
+            "/api/users/?fields=password",
+            "/api/users/subscriptions/?omit=recipe",
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
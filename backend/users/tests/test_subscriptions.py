@@ -0,0 +1,151 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+URL = "/api/users/subscriptions/"
+
+
+class SubscriptionRecipesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="subscriber")
+        cls.authors = {}
+        for username, recipes_count in (
+            ("prolific", 5),
+            ("single", 1),
+            ("empty", 0),
+        ):
+            cls.authors[username] = cls._create_author(
+                username, recipes_count
+            )
+
+    @classmethod
+    def _create_author(cls, username, recipes_count):
+        author = User.objects.create_user(username=username)
+        for number in range(recipes_count):
+            Recipe.objects.create(
+                author=author,
+                name=f"{username} {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+        Subscription.objects.create(user=cls.user, author=author)
+        return author
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _get_results(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            author["username"]: author for author in response.json()["results"]
+        }
+
+    def _latest_ids(self, username, limit=None):
+        return list(
+            self.authors[username]
+            .recipes.order_by("-id")
+            .values_list("id", flat=True)[:limit]
+        )
+
+    def test_recipes_limit(self):
+        results = self._get_results(f"{URL}?recipes_limit=2")
+        for username, recipes_count in (
+            ("prolific", 5),
+            ("single", 1),
+            ("empty", 0),
+        ):
+            with self.subTest(username=username):
+                author = results[username]
+                self.assertEqual(
+                    [recipe["id"] for recipe in author["recipes"]],
+                    self._latest_ids(username, 2),
+                )
+                self.assertEqual(author["recipes_count"], recipes_count)
+
+    def test_without_recipes_limit(self):
+        results = self._get_results(URL)
+        self.assertEqual(
+            [recipe["id"] for recipe in results["prolific"]["recipes"]],
+            self._latest_ids("prolific"),
+        )
+        self.assertEqual(
+            set(results["prolific"]["recipes"][0]),
+            {"id", "name", "image", "cooking_time"},
+        )
+
+    def test_zero_recipes_limit(self):
+        results = self._get_results(f"{URL}?recipes_limit=0")
+        self.assertEqual(results["prolific"]["recipes"], [])
+        self.assertEqual(results["prolific"]["recipes_count"], 5)
+
+    def test_invalid_recipes_limit(self):
+        for recipes_limit in ("-1", "два"):
+            with self.subTest(recipes_limit=recipes_limit):
+                response = self.client.get(
+                    f"{URL}?recipes_limit={recipes_limit}"
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn("recipes_limit", response.json())
+
+    def test_query_count_does_not_depend_on_authors(self):
+        url = f"{URL}?recipes_limit=3"
+        with CaptureQueriesContext(connection) as context:
+            self._get_results(url)
+        queries = len(context)
+        self._create_author("late", 4)
+        with self.assertNumQueries(queries):
+            results = self._get_results(url)
+        self.assertEqual(len(results["late"]["recipes"]), 3)
+
+    def test_recipes_skip_unused_columns(self):
+        for url in (URL, f"{URL}?recipes_limit=2"):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self._get_results(url)
+                self.assertFalse(
+                    any(
+                        '"recipes_recipe"."text"' in query["sql"]
+                        for query in context
+                    )
+                )
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_count_is_cached_per_user(self):
+        other_client = APIClient()
+        other_client.force_authenticate(
+            User.objects.create_user(username="other")
+        )
+        cache.clear()
+        self.assertEqual(self.client.get(URL).json()["count"], 3)
+        self.assertEqual(other_client.get(URL).json()["count"], 0)
+        self._create_author("late", 1)
+        self.assertEqual(self.client.get(URL).json()["count"], 4)
+
+    def test_subscribe_recipes_limit(self):
+        author = User.objects.create_user(username="new_author")
+        for number in range(3):
+            Recipe.objects.create(
+                author=author,
+                name=f"рецепт {number}",
+                image=None,
+                text="описание",
+                cooking_time=5,
+            )
+        response = self.client.post(
+            f"/api/users/{author.id}/subscribe/?recipes_limit=1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.json()["recipes"]), 1)
+        self.assertEqual(response.json()["recipes_count"], 3)
@@ -124,6 +124,22 @@ class UsersViewsTest(TestCase):
         }
         self.assertEqual(response.json(), test_json)
 
+    def test_get_users_list_num_queries(self):
+        url = "/api/users/?limit=50"
+        for number in range(10):
+            author = User.objects.create_user(username=f"author_{number}")
+            Subscription.objects.create(user=self.user, author=author)
+        # count, users with is_subscribed
+        with self.assertNumQueries(2):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        subscribed = [
+            user["username"]
+            for user in response.json()["results"]
+            if user["is_subscribed"]
+        ]
+        self.assertEqual(len(subscribed), 11)
+
     def test_create_user_with_simple_password(self):
         url = "/api/users/"
         data = {
@@ -1,17 +1,73 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Subscription, User
+from recipes.models import Recipe
+from recipes.pagination import CACHED
+from recipes.relations import (add_relation, apply_relation_batch,
+                               remove_relation, to_pk)
+from recipes.serializers import RelationBatchSerializer
+
+from .models import Subscription, User, annotate_is_subscribed
 from .pagination import UsersPagination
-from .serializers import UserSubscriptionSerializer
+from .serializers import RecipeSerializer, UserSubscriptionSerializer
 
 
 class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all().order_by("id")
     pagination_class = UsersPagination
+    pagination_count_mode = CACHED
+
+    @property
+    def pagination_count_per_user(self):
+        return self.action == "subscriptions"
+
+    def get_queryset(self):
+        if self.action not in ("list", "retrieve"):
+            return super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        selected = serializer_class.get_selected_fields(self.request)
+        queryset = super().get_queryset().only(
+            *serializer_class.get_model_columns(selected)
+        )
+        if "is_subscribed" not in selected:
+            return queryset
+        return annotate_is_subscribed(queryset, self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ("subscribe", "subscriptions"):
+            context["recipes_limit"] = self.get_recipes_limit()
+        return context
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get("recipes_limit")
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdigit():
+            raise ValidationError(
+                {"recipes_limit": "Введите неотрицательное целое число."}
+            )
+        return int(recipes_limit)
+
+    def attach_latest_recipes(self, authors, recipes_limit):
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.only(
+            *RecipeSerializer.model_fields
+        ).latest_by_author(
+            [author.pk for author in authors],
+            recipes_limit,
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = recipes[author.pk]
 
     @action(
         detail=True,
@@ -25,47 +81,74 @@ class CustomUserViewSet(UserViewSet):
             if user == author:
                 data = {"errors": "Нельзя подписаться на самого себя"}
                 return Response(data, status=status.HTTP_400_BAD_REQUEST)
-            if Subscription.objects.filter(
-                user=user,
-                author=author,
-            ).exists():
+            if not add_relation(
+                Subscription, user_id=user.pk, author_id=author.pk
+            ):
                 data = {"errors": "Вы уже подписаны на данного пользователя"}
                 return Response(data, status=status.HTTP_400_BAD_REQUEST)
-            Subscription.objects.create(
-                user=user,
-                author=author,
-            )
             serializer = UserSubscriptionSerializer(
                 author,
-                context={"request": request},
+                context=self.get_serializer_context(),
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         if request.method == "DELETE":
-            user = request.user
-            author = self.get_object()
-            subscription = Subscription.objects.filter(
-                user=user,
-                author=author,
-            )
-            if subscription.exists():
-                subscription.delete()
+            if remove_relation(
+                Subscription,
+                user_id=request.user.pk,
+                author_id=to_pk(User, self.kwargs[self.lookup_field]),
+            ):
                 return Response(status=status.HTTP_204_NO_CONTENT)
+            self.get_object()
             data = {"errors": "Вы не подписаны на данного пользователя"}
             return Response(data, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="subscribe/batch",
+        url_name="subscribe-batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def subscribe_batch(self, request):
+        serializer = RelationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_relation_batch(
+            Subscription,
+            {"user_id": request.user.pk},
+            "author_id",
+            User.objects.all(),
+            forbidden={request.user.pk},
+            **serializer.validated_data,
+        )
+        return Response({"results": results})
+
     @action(
         detail=False,
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
         user = request.user
+        selected = UserSubscriptionSerializer.get_selected_fields(request)
         subscribed_authors = User.objects.filter(
             subscribed_authors__user=user
+        ).only(
+            *UserSubscriptionSerializer.get_model_columns(selected)
         ).order_by("subscribed_authors")
+        if "is_subscribed" in selected:
+            subscribed_authors = annotate_is_subscribed(
+                subscribed_authors, user
+            )
+        if "recipes_count" in selected:
+            subscribed_authors = subscribed_authors.annotate(
+                recipes_count=Coalesce(F("stats__recipes_count"), 0),
+            )
+        context = self.get_serializer_context()
         pages = self.paginate_queryset(subscribed_authors)
+        if "recipes" in selected:
+            self.attach_latest_recipes(pages, context["recipes_limit"])
         serializer = UserSubscriptionSerializer(
             pages,
             many=True,
-            context={"request": request},
+            context=context,
         )
         return self.get_paginated_response(serializer.data)